@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmarks del traductor (Helsinki-NLP/opus-mt-en-es)
+
+Modos:
+- batching: peticiones/segundo frente a la ventana de micro-batching. La fila
+  "sin batching" reproduce la invocación una a una de la versión anterior.
+- estilos: tokens por petición y latencia por estilo, comparando el prompt anterior
+  (instrucción + texto en cada llamada) con la instrucción traducida una sola vez.
+- backends: latencia, throughput, RSS y concordancia de salida (BLEU aproximado
+  contra pytorch float32) para cada TRANSLATOR_BACKEND. Cada backend se mide en
+  un subproceso propio para que el RSS no se contamine entre ellos.
+
+Ejecutar:
+  python benchmark_traduccion.py --modo batching --peticiones 64 --ventanas 0 2 5 10 20
+  python benchmark_traduccion.py --modo estilos --repeticiones 3
+  python benchmark_traduccion.py --modo backends --backends pytorch pytorch-int8 onnx
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import main
+
+TEXTOS = [
+    "Hello, how are you today?",
+    "The weather is very nice this morning.",
+    "Please send me the report before Friday.",
+    "Machine translation keeps getting better every year.",
+    "Thank you for your help with the project.",
+    "Where is the nearest train station?",
+    "I would like to book a table for two people.",
+    "This application translates text from English to Spanish.",
+]
+
+# 📦 Modo batching
+async def medir_batcher(peticiones: int, max_batch_size: int, ventana_ms: float, estilo: str) -> dict:
+    """Lanza N peticiones concurrentes contra un batcher nuevo"""
+    batcher = main.TranslationBatcher(max_batch_size=max_batch_size, max_wait_ms=ventana_ms)
+    textos = [TEXTOS[i % len(TEXTOS)] for i in range(peticiones)]
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(batcher.translate(texto, estilo) for texto in textos))
+    duracion = time.perf_counter() - inicio
+
+    return {
+        "req_s": peticiones / duracion,
+        "lotes": batcher.stats["lotes"],
+        "lote_medio": batcher.stats["peticiones"] / max(batcher.stats["lotes"], 1),
+    }
+
+async def benchmark_batching(args):
+    print("⏳ Cargando modelo...")
+    main.load_translator()
+
+    print(f"\n📊 {args.peticiones} peticiones concurrentes, estilo '{args.estilo}'\n")
+    print(f"{'configuración':<28}{'req/s':>10}{'lotes':>8}{'lote medio':>12}")
+    print("-" * 58)
+
+    base = await medir_batcher(args.peticiones, 1, 0, args.estilo)
+    print(f"{'sin batching (1 a 1)':<28}{base['req_s']:>10.2f}{base['lotes']:>8}{base['lote_medio']:>12.1f}")
+
+    for ventana in args.ventanas:
+        r = await medir_batcher(args.peticiones, args.max_batch, ventana, args.estilo)
+        etiqueta = f"ventana {ventana:g} ms (max {args.max_batch})"
+        print(f"{etiqueta:<28}{r['req_s']:>10.2f}{r['lotes']:>8}{r['lote_medio']:>12.1f}"
+              f"   x{r['req_s'] / base['req_s']:.1f}")
+
+# 🎨 Modo estilos
+def benchmark_estilos(args):
+    print("⏳ Cargando modelo...")
+    main.load_translator()
+    pipe = main.translator_llm.pipeline
+    contar_tokens = lambda texto: len(pipe.tokenizer(texto).input_ids)
+
+    def medir(textos: List[str], traducir) -> float:
+        """Latencia media en ms por texto"""
+        t0 = time.perf_counter()
+        for _ in range(args.repeticiones):
+            for texto in textos:
+                traducir(texto)
+        return (time.perf_counter() - t0) * 1000 / (len(textos) * args.repeticiones)
+
+    print(f"\n📊 Tokens y latencia por estilo ({len(TEXTOS)} textos x {args.repeticiones})\n")
+    print(f"{'estilo':<10}{'tokens antes':>14}{'tokens ahora':>14}{'ms antes':>10}{'ms ahora':>10}")
+    print("-" * 58)
+    for estilo, instruccion in main.STYLE_PREFIXES.items():
+        # Prompt anterior: la instrucción viajaba con cada texto hasta el modelo
+        prompt_anterior = lambda texto: f"{instruccion} {texto}" if instruccion else texto
+        tokens_antes = statistics.mean(contar_tokens(prompt_anterior(t)) for t in TEXTOS)
+        tokens_ahora = statistics.mean(contar_tokens(t) for t in TEXTOS)
+        ms_antes = medir(TEXTOS, lambda t: pipe(prompt_anterior(t)))
+        ms_ahora = medir(TEXTOS, lambda t: main.chains[estilo].invoke({"texto": t}))
+        print(f"{estilo:<10}{tokens_antes:>14.1f}{tokens_ahora:>14.1f}{ms_antes:>10.1f}{ms_ahora:>10.1f}")
+
+# 🏗️ Modo backends
+def rss_mb() -> float:
+    """RSS actual del proceso en MB (Linux)"""
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith("VmRSS:"):
+                return int(linea.split()[1]) / 1024
+    return float("nan")
+
+def bleu(hipotesis: List[str], referencias: List[str], max_n: int = 4) -> float:
+    """BLEU de corpus con suavizado +1, suficiente para comparar backends entre sí"""
+    coincidencias, totales = [0] * max_n, [0] * max_n
+    len_hip = len_ref = 0
+    for hip, ref in zip(hipotesis, referencias):
+        tokens_hip, tokens_ref = hip.split(), ref.split()
+        len_hip += len(tokens_hip)
+        len_ref += len(tokens_ref)
+        for n in range(1, max_n + 1):
+            ngramas_hip = Counter(tuple(tokens_hip[i:i + n]) for i in range(len(tokens_hip) - n + 1))
+            ngramas_ref = Counter(tuple(tokens_ref[i:i + n]) for i in range(len(tokens_ref) - n + 1))
+            coincidencias[n - 1] += sum(min(c, ngramas_ref[g]) for g, c in ngramas_hip.items())
+            totales[n - 1] += max(len(tokens_hip) - n + 1, 0)
+
+    if len_hip == 0:
+        return 0.0
+    log_precision = sum(math.log((c + 1) / (t + 1)) for c, t in zip(coincidencias, totales)) / max_n
+    penalizacion = 1.0 if len_hip > len_ref else math.exp(1 - len_ref / len_hip)
+    return 100 * penalizacion * math.exp(log_precision)
+
+def medir_backend(backend: str, repeticiones: int, batch_size: int) -> dict:
+    """Carga un backend y mide latencia individual, throughput por lotes y RSS"""
+    inicio = time.perf_counter()
+    # Mismo tamaño de lote configurado en el pipeline que usa el servidor
+    pipe = main.build_translation_pipeline(backend, batch_size)
+    tiempo_carga = time.perf_counter() - inicio
+
+    traducir = lambda textos: [r["translation_text"] for r in pipe(textos)]
+    traducir(TEXTOS[:2])  # warmup
+
+    latencias = []
+    for _ in range(repeticiones):
+        for texto in TEXTOS:
+            t0 = time.perf_counter()
+            traducir([texto])
+            latencias.append((time.perf_counter() - t0) * 1000)
+
+    lote = TEXTOS * repeticiones
+    t0 = time.perf_counter()
+    traducir(lote)
+    throughput = len(lote) / (time.perf_counter() - t0)
+
+    return {
+        "backend": backend,
+        "carga_s": tiempo_carga,
+        "p50_ms": statistics.median(latencias),
+        "p95_ms": sorted(latencias)[int(len(latencias) * 0.95) - 1],
+        "textos_s": throughput,
+        "rss_mb": rss_mb(),
+        "traducciones": traducir(TEXTOS),
+    }
+
+def benchmark_backends(args):
+    resultados = []
+    for backend in args.backends:
+        print(f"⏳ Midiendo backend '{backend}'...")
+        proceso = subprocess.run(
+            [sys.executable, __file__, "--modo", "backend-worker", "--backend", backend,
+             "--repeticiones", str(args.repeticiones), "--max-batch", str(args.max_batch)],
+            capture_output=True, text=True
+        )
+        if proceso.returncode != 0:
+            lineas = proceso.stderr.strip().splitlines()
+            detalle = lineas[-1] if lineas else f"código de salida {proceso.returncode}"
+            print(f"❌ '{backend}' falló:\n{detalle}")
+            continue
+        resultados.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+
+    if not resultados:
+        return
+
+    referencia = next((r for r in resultados if r["backend"] == "pytorch"), resultados[0])
+    print(f"\n📊 Referencia de concordancia: {referencia['backend']}\n")
+    print(f"{'backend':<14}{'carga s':>9}{'p50 ms':>9}{'p95 ms':>9}{'textos/s':>10}{'RSS MB':>9}{'BLEU':>7}{'= exactas':>11}")
+    print("-" * 78)
+    for r in resultados:
+        exactas = sum(a == b for a, b in zip(r["traducciones"], referencia["traducciones"]))
+        print(f"{r['backend']:<14}{r['carga_s']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['textos_s']:>10.1f}{r['rss_mb']:>9.0f}"
+              f"{bleu(r['traducciones'], referencia['traducciones']):>7.1f}"
+              f"{exactas:>6}/{len(TEXTOS)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del traductor")
+    parser.add_argument("--modo", choices=["batching", "estilos", "backends", "backend-worker"], default="batching")
+    parser.add_argument("--peticiones", type=int, default=64)
+    parser.add_argument("--max-batch", type=int, default=main.BATCH_MAX_SIZE)
+    parser.add_argument("--ventanas", type=float, nargs="+", default=[0, 2, 5, 10, 20])
+    parser.add_argument("--estilo", default="basico", choices=["basico", "formal", "creativo"])
+    parser.add_argument("--backends", nargs="+", default=list(main.TRANSLATOR_BACKENDS))
+    parser.add_argument("--backend", default="pytorch", choices=main.TRANSLATOR_BACKENDS)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.modo == "batching":
+        asyncio.run(benchmark_batching(args))
+    elif args.modo == "estilos":
+        benchmark_estilos(args)
+    elif args.modo == "backends":
+        benchmark_backends(args)
+    else:
+        print(json.dumps(medir_backend(args.backend, args.repeticiones, args.max_batch), ensure_ascii=False))
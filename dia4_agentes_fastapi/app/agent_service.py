@@ -2,9 +2,11 @@
 Servicio de Agente IA con patrón ReAct y herramientas reales
 """
 
+import re
 import time
 import logging
 import asyncio
+import threading
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -13,10 +15,10 @@ from langchain.agents import AgentExecutor, create_react_agent
 from langchain_core.prompts import PromptTemplate
 from langchain_core.tools import Tool
 from langchain_core.language_models.llms import BaseLLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
-from langchain_core.outputs import LLMResult, Generation
+from langchain_core.callbacks.manager import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
+from langchain_core.outputs import LLMResult, Generation, GenerationChunk
 from langchain_huggingface import HuggingFacePipeline
-from typing import Optional, List, Any, Dict, Mapping
+from typing import Optional, List, Any, Dict, Mapping, Tuple, AsyncIterator, Awaitable, Callable
 
 # HuggingFace imports
 try:
@@ -31,11 +33,31 @@ except ImportError as e:
 
 # Configuración y herramientas locales
 from .config import get_settings
-from .tools import create_langchain_tools, create_tool_manager
+from .executors import (
+    ExecutorSaturatedError,
+    get_executor,
+    get_executors_stats,
+    shutdown_executors,
+    track_queue_wait
+)
+from .streaming import AgentStreamHandler
+from .response_cache import create_response_cache
+from .run_memo import ToolCallKey, memoize_tool, run_memo_scope, tool_call_key
+from .planning import MultiActionReActOutputParser, PARALLEL_ACTIONS_INSTRUCTIONS
+from .tools import (
+    create_langchain_tools,
+    create_tool_manager,
+    shutdown_background_loop,
+    deadline_scope,
+    tool_timing_scope
+)
 from .models import AgentResponse, AgentStep, ToolType
 
 logger = logging.getLogger(__name__)
 
+class QueryCancelledError(Exception):
+    """El cliente abandonó la consulta antes de que el agente terminara"""
+
 class AgentService:
     """Servicio principal del agente IA con herramientas reales"""
     
@@ -45,6 +67,7 @@ class AgentService:
         self.agent_executor = None
         self.tool_manager = None
         self.langchain_tools = []
+        self.response_cache = create_response_cache()
         self.is_initialized = False
         
     async def initialize(self):
@@ -120,8 +143,8 @@ class AgentService:
                 device=0 if device == "cuda" else -1
             )
             
-            # Crear LLM de LangChain
-            self.llm = HuggingFacePipeline(pipeline=hf_pipeline)
+            # Crear LLM de LangChain (inferencia async en el pool del LLM)
+            self.llm = PooledHuggingFacePipeline(pipeline=hf_pipeline)
             
             logger.info(f"[LLM] LLM de HuggingFace configurado exitosamente")
             
@@ -150,10 +173,14 @@ class AgentService:
         self.tool_manager = create_tool_manager()
         
         # Crear herramientas para LangChain
-        self.langchain_tools = create_langchain_tools()
+        self.langchain_tools = create_langchain_tools(self.tool_manager)
+        if self.response_cache:
+            # tools_used lleva los nombres del agente; los TTL van por nombre registrado
+            self.response_cache.set_tool_names({tool.name: tool.tool.name for tool in self.langchain_tools})
         
-        # Verificar salud de herramientas
+        # Verificar salud de herramientas (en paralelo, fuera del event loop) y mantenerla al día
         health_status = await self.tool_manager.health_check_all()
+        self.tool_manager.start_health_refresher()
         
         available_tools = [name for name, status in health_status.items() if status]
         unavailable_tools = [name for name, status in health_status.items() if not status]
@@ -165,7 +192,7 @@ class AgentService:
     async def _setup_agent(self):
         """Configurar agente ReAct"""
         # Prompt mejorado para ReAct con mejor compatibilidad
-        react_prompt = PromptTemplate.from_template("""Answer the following questions as best you can. You have access to the following tools:
+        react_template = """Answer the following questions as best you can. You have access to the following tools:
 
 {tools}
 
@@ -179,7 +206,7 @@ Observation: the result of the action
 ... (this Thought/Action/Action Input/Observation can repeat N times)
 Thought: I now know the final answer
 Final Answer: the final answer to the original input question
-
+{parallel_instructions}
 IMPORTANT RULES:
 - Always respond in Spanish but keep the keywords (Thought, Action, Action Input, Final Answer) in English
 - Use tools when you need specific information
@@ -187,16 +214,27 @@ IMPORTANT RULES:
 - If you can answer directly without tools, skip to Final Answer
 
 Question: {input}
-{agent_scratchpad}""")
+{agent_scratchpad}"""
+        # Modo planificación: varias acciones independientes por turno, en paralelo.
+        # Se insertan en el texto antes de crear la plantilla para que su {tool_names}
+        # también se rellene (un valor de partial() no se vuelve a formatear)
+        parallel = self.settings.agent_parallel_tools
+        react_prompt = PromptTemplate.from_template(react_template.replace(
+            "{parallel_instructions}", PARALLEL_ACTIONS_INSTRUCTIONS if parallel else ""
+        ))
         
         # Convertir herramientas a formato LangChain Tool
         langchain_tools_formatted = []
         for tool in self.langchain_tools:
+            coroutine = tool.arun
+            if self.settings.tool_call_memo_enabled:
+                # Repetir el mismo Action/Action Input en una ejecución reutiliza la observación
+                coroutine = memoize_tool(tool.name, tool.arun)
             langchain_tool = Tool(
                 name=tool.name,
                 description=tool.description,
                 func=tool.run,
-                coroutine=tool.arun
+                coroutine=coroutine
             )
             langchain_tools_formatted.append(langchain_tool)
         
@@ -204,7 +242,8 @@ Question: {input}
         agent = create_react_agent(
             llm=self.llm,
             tools=langchain_tools_formatted,
-            prompt=react_prompt
+            prompt=react_prompt,
+            output_parser=MultiActionReActOutputParser() if parallel else None
         )
         
         # Crear executor del agente con configuración robusta
@@ -224,9 +263,14 @@ Question: {input}
         self, 
         query: str, 
         context: Optional[str] = None,
-        tools: Optional[List[ToolType]] = None
+        tools: Optional[List[ToolType]] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
     ) -> AgentResponse:
-        """Procesar consulta del usuario"""
+        """Procesar consulta del usuario
+        
+        Si se pasa is_disconnected (p. ej. Request.is_disconnected), la ejecución se
+        cancela en cuanto el cliente se va y se lanza QueryCancelledError.
+        """
         start_time = time.time()
         
         try:
@@ -235,46 +279,141 @@ Question: {input}
             
             logger.info(f"[QUERY] Procesando consulta: {query[:100]}...")
             
+            # Consultar caché de respuestas
+            embedding = None
+            if self.response_cache:
+                cached, cache_age, embedding = await self.response_cache.lookup(query, context, tools)
+                if cached is not None:
+                    logger.info(f"[CACHE] Respuesta servida desde caché (edad {cache_age:.1f}s)")
+                    elapsed = time.time() - start_time
+                    return cached.model_copy(update={
+                        "cached": True,
+                        "cache_age": cache_age,
+                        "processing_time": elapsed,
+                        "queue_time": 0.0,
+                        "execution_time": elapsed
+                    })
+            
             # Construir entrada completa
             full_input = self._build_input(query, context)
             
-            # Ejecutar agente
-            result = await self._execute_agent(full_input)
-            
-            # Extraer pasos y respuesta
-            steps = self._extract_steps(result.get('intermediate_steps', []))
-            final_answer = result.get('output', 'No se pudo generar respuesta')
-            
-            # Extraer herramientas usadas
-            tools_used = self._extract_tools_used(steps)
-            
-            processing_time = time.time() - start_time
-            
-            response = AgentResponse(
-                response=final_answer,
-                steps=steps,
-                tools_used=tools_used,
-                processing_time=processing_time,
-                success=True
-            )
+            result, queue_time = await self._run_agent(full_input, is_disconnected=is_disconnected)
+            execution_time = time.time() - start_time - queue_time
             
-            logger.info(f"[SUCCESS] Consulta procesada en {processing_time:.2f}s")
+            response = self._build_response(result, start_time, queue_time, execution_time)
+            if self.response_cache:
+                self.response_cache.store(query, context, tools, response, embedding)
             return response
             
+        except (ExecutorSaturatedError, QueryCancelledError):
+            # Sin capacidad o sin cliente: que la API decida, no una respuesta fallida
+            raise
         except Exception as e:
-            processing_time = time.time() - start_time
-            error_msg = str(e)
+            return self._build_error_response(e, start_time)
+    
+    async def stream_query(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        tools: Optional[List[ToolType]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Procesar consulta emitiendo (evento, datos) a medida que el agente avanza
+        
+        Eventos: 'token' (razonamiento), 'step', 'observation', 'answer' (tokens de
+        la respuesta final) y, al terminar, 'final' con el AgentResponse completo o
+        'error'. Si el consumidor deja de iterar, la ejecución del agente se cancela.
+        """
+        start_time = time.time()
+        
+        if not self.is_initialized:
+            raise RuntimeError("AgentService no está inicializado")
+        
+        logger.info(f"[STREAM] Procesando consulta en streaming: {query[:100]}...")
+        
+        handler = AgentStreamHandler(self.settings.tool_call_memo_enabled)
+        full_input = self._build_input(query, context)
+        
+        task = asyncio.create_task(self._run_agent(full_input, callbacks=[handler]))
+        try:
+            # Reenviar eventos hasta que el agente termine y la cola quede vacía
+            while not (task.done() and handler.queue.empty()):
+                get_event = asyncio.ensure_future(handler.queue.get())
+                await asyncio.wait({get_event, task}, return_when=asyncio.FIRST_COMPLETED)
+                if get_event.done():
+                    yield get_event.result()
+                else:
+                    get_event.cancel()
             
-            logger.error(f"[ERROR] Error procesando consulta: {error_msg}")
+            try:
+                result, queue_time = task.result()
+            except ExecutorSaturatedError as e:
+                logger.warning(f"[BUSY] Consulta en streaming rechazada: {e}")
+                yield "error", {"error": str(e), "retry_after": 1}
+                return
+            except Exception as e:
+                response = self._build_error_response(e, start_time)
+                yield "error", response.model_dump(mode="json")
+                return
             
-            return AgentResponse(
-                response=f"Error procesando consulta: {error_msg}",
-                steps=[],
-                tools_used=[],
-                processing_time=processing_time,
-                success=False,
-                error_message=error_msg
-            )
+            execution_time = time.time() - start_time - queue_time
+            response = self._build_response(result, start_time, queue_time, execution_time)
+            yield "final", response.model_dump(mode="json")
+        finally:
+            if not task.done():
+                # El cliente se desconectó o dejó de leer: no seguir gastando LLM
+                logger.info("[STREAM] Consumidor cerrado, cancelando ejecución del agente")
+                task.cancel()
+    
+    def _build_response(
+        self,
+        result: Dict[str, Any],
+        start_time: float,
+        queue_time: float,
+        execution_time: float
+    ) -> AgentResponse:
+        """Construir AgentResponse a partir del resultado del AgentExecutor"""
+        # Extraer pasos y respuesta
+        steps = self._extract_steps(
+            result.get('intermediate_steps', []), result.get('tool_timings'), result.get('memo_calls')
+        )
+        final_answer = result.get('output', 'No se pudo generar respuesta')
+        
+        # Extraer herramientas usadas
+        tools_used = self._extract_tools_used(steps)
+        
+        processing_time = time.time() - start_time
+        
+        response = AgentResponse(
+            response=final_answer,
+            steps=steps,
+            tools_used=tools_used,
+            processing_time=processing_time,
+            queue_time=queue_time,
+            execution_time=execution_time,
+            success=True
+        )
+        
+        logger.info(
+            f"[SUCCESS] Consulta procesada en {processing_time:.2f}s "
+            f"(cola {queue_time:.3f}s, ejecución {execution_time:.2f}s)"
+        )
+        return response
+    
+    def _build_error_response(self, error: Exception, start_time: float) -> AgentResponse:
+        """Construir AgentResponse fallido"""
+        processing_time = time.time() - start_time
+        error_msg = str(error)
+        
+        logger.error(f"[ERROR] Error procesando consulta: {error_msg}")
+        
+        return AgentResponse(
+            response=f"Error procesando consulta: {error_msg}",
+            steps=[],
+            tools_used=[],
+            processing_time=processing_time,
+            success=False,
+            error_message=error_msg
+        )
     
     def _build_input(self, query: str, context: Optional[str]) -> str:
         """Construir entrada completa para el agente"""
@@ -282,34 +421,119 @@ Question: {input}
             return f"Contexto: {context}\n\nPregunta: {query}"
         return query
     
-    async def _execute_agent(self, input_text: str) -> Dict[str, Any]:
-        """Ejecutar el agente de forma asíncrona"""
-        loop = asyncio.get_event_loop()
+    async def _run_agent(
+        self,
+        full_input: str,
+        callbacks: Optional[List] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Tuple[Dict[str, Any], float]:
+        """Ejecutar el agente con límite duro de agent_timeout; devuelve (resultado, espera en cola)
         
-        # AgentExecutor no es nativo async, usar thread pool
-        result = await loop.run_in_executor(
-            None,
-            lambda: self.agent_executor.invoke({"input": input_text})
-        )
+        El límite se propaga a las herramientas (remaining_budget) y, al vencer o al
+        desconectarse el cliente, se cancela la tarea: el bucle ReAct, las herramientas
+        en curso y las llamadas aún encoladas en los pools.
+        """
+        timeout = self.settings.agent_timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        # Acumular la espera en cola de los pools y los tiempos de las herramientas
+        run_start = time.perf_counter()
+        with deadline_scope(timeout), track_queue_wait() as wait, run_memo_scope() as memo, \
+                tool_timing_scope() as timings:
+            task = asyncio.create_task(self._execute_agent(full_input, callbacks))
         
-        return result
+        try:
+            while not task.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"La consulta superó el límite de {timeout}s")
+                poll = min(self.settings.disconnect_poll_interval, remaining) if is_disconnected else remaining
+                await asyncio.wait({task}, timeout=poll)
+                if not task.done() and is_disconnected and await is_disconnected():
+                    raise QueryCancelledError("El cliente cerró la conexión")
+        finally:
+            if not task.done():
+                logger.info("[CANCEL] Cancelando ejecución del agente")
+                task.cancel()
+        
+        result = task.result()
+        result["tool_timings"] = [
+            {**t, "start": t["start"] - run_start, "end": t["end"] - run_start} for t in timings
+        ]
+        result["memo_calls"] = list(memo.calls)
+        return result, wait["seconds"]
+    
+    async def _execute_agent(self, input_text: str, callbacks: Optional[List] = None) -> Dict[str, Any]:
+        """Ejecutar el bucle ReAct de forma nativa async"""
+        # ainvoke mantiene el bucle y las herramientas (coroutine=arun) en el event loop
+        # de la app; solo la inferencia bloqueante del LLM pasa por el pool del LLM
+        config = {"callbacks": callbacks} if callbacks else None
+        return await self.agent_executor.ainvoke({"input": input_text}, config=config)
     
-    def _extract_steps(self, intermediate_steps: List) -> List[AgentStep]:
+    def _extract_steps(
+        self,
+        intermediate_steps: List,
+        tool_timings: Optional[List[Dict[str, Any]]] = None,
+        memo_calls: Optional[List[Tuple[ToolCallKey, bool]]] = None
+    ) -> List[AgentStep]:
         """Extraer pasos del proceso de razonamiento"""
         steps = []
         
+        # Si cada llamada se sirvió desde la memo, en orden por herramienta y entrada
+        pending_memo: Dict[ToolCallKey, List[bool]] = {}
+        for key, reused in memo_calls or []:
+            pending_memo.setdefault(key, []).append(reused)
+        
+        # Asociar cada paso con su ejecución en ToolManager (por herramienta y entrada)
+        pending_timings = list(tool_timings or [])
+        manager_names = {tool.name: tool.tool.name for tool in self.langchain_tools}
+        
         for i, (agent_action, observation) in enumerate(intermediate_steps):
+            call = tool_call_key(getattr(agent_action, 'tool', ''), getattr(agent_action, 'tool_input', ''))
+            memo_hits = pending_memo.get(call)
             step = AgentStep(
                 step_number=i + 1,
                 thought=agent_action.log if hasattr(agent_action, 'log') else "Pensando...",
                 action=agent_action.tool if hasattr(agent_action, 'tool') else None,
                 tool_used=agent_action.tool if hasattr(agent_action, 'tool') else None,
-                observation=str(observation) if observation else None
+                observation=str(observation) if observation else None,
+                reused=memo_hits.pop(0) if memo_hits else False
             )
+            if not step.reused:
+                manager_call = (manager_names.get(call[0], call[0]), call[1])
+                timing = next(
+                    (t for t in pending_timings if tool_call_key(t["tool"], t["input"]) == manager_call),
+                    None
+                )
+                if timing is not None:
+                    pending_timings.remove(timing)
+                    step.started_at = round(timing["start"], 4)
+                    step.wall_time = round(timing["end"] - timing["start"], 4)
             steps.append(step)
         
+        self._compute_overlap(steps)
         return steps
     
+    @staticmethod
+    def _compute_overlap(steps: List[AgentStep]):
+        """Segundos de cada paso durante los que otra herramienta también estaba corriendo"""
+        timed = [step for step in steps if step.wall_time is not None]
+        for step in timed:
+            start, end = step.started_at, step.started_at + step.wall_time
+            # Unir los intervalos de los demás pasos, recortados al de este paso
+            clipped = sorted(
+                (max(other.started_at, start), min(other.started_at + other.wall_time, end))
+                for other in timed if other is not step
+            )
+            overlap, covered_until = 0.0, start
+            for s_start, s_end in clipped:
+                s_start = max(s_start, covered_until)
+                if s_end > s_start:
+                    overlap += s_end - s_start
+                    covered_until = s_end
+            step.overlap = round(overlap, 4)
+    
     def _extract_tools_used(self, steps: List[AgentStep]) -> List[str]:
         """Extraer lista de herramientas utilizadas"""
         tools_used = []
@@ -324,9 +548,11 @@ Question: {input}
             if not self.is_initialized:
                 return False
             
-            # Verificar herramientas
+            # Verificar herramientas: estado cacheado que mantiene el refresco en segundo plano
             if self.tool_manager:
-                tools_health = await self.tool_manager.health_check_all()
+                tools_health = self.tool_manager.get_cached_health()
+                if not tools_health:
+                    tools_health = await self.tool_manager.health_check_all()
                 return any(tools_health.values())
             
             return True
@@ -341,6 +567,16 @@ Question: {input}
         
         return self.tool_manager.get_tools_info()
     
+    def get_pools_status(self) -> Dict[str, Any]:
+        """Obtener métricas de los pools de ejecución"""
+        return get_executors_stats()
+    
+    def get_cache_status(self) -> Dict[str, Any]:
+        """Obtener métricas de la caché de respuestas"""
+        if not self.response_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.response_cache.get_stats()}
+    
     def get_available_tools(self) -> List[Dict[str, Any]]:
         """Obtener herramientas disponibles"""
         if not self.tool_manager:
@@ -353,7 +589,88 @@ Question: {input}
         """Limpiar recursos"""
         logger.info("[CLEANUP] Limpiando AgentService...")
         self.is_initialized = False
-        # Aquí se pueden limpiar recursos adicionales si es necesario
+        if self.tool_manager:
+            await self.tool_manager.stop_health_refresher()
+            self.tool_manager.close_all()
+        shutdown_executors()
+        shutdown_background_loop()
+
+class PooledHuggingFacePipeline(HuggingFacePipeline):
+    """HuggingFacePipeline cuya inferencia async usa el pool del LLM en lugar del executor por defecto"""
+    
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """Ejecutar la generación síncrona en el pool dedicado"""
+        return await get_executor("llm").run(
+            self._generate,
+            prompts,
+            stop,
+            run_manager.get_sync() if run_manager else None,
+            **kwargs
+        )
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Consumir el streaming síncrono del pipeline desde el pool y reenviar cada token
+        
+        Se espera a la vez a la cola y al productor: si el pool está saturado el
+        productor falla sin llegar a ejecutarse y su error (ExecutorSaturatedError)
+        se propaga en lugar de esperar para siempre un token que no llegará.
+        """
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stopped = threading.Event()
+        
+        def produce():
+            try:
+                for chunk in self._stream(prompt, stop, None, **kwargs):
+                    if stopped.is_set():
+                        # El consumidor se canceló o dejó de iterar: no seguir generando
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
+        
+        producer = asyncio.ensure_future(get_executor("llm").run(produce))
+        getter: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if producer.done():
+                    # Fallo del productor o del pool; si terminó bien, `done` ya está en la cola
+                    producer.result()
+                    chunk = await chunks.get()
+                else:
+                    getter = asyncio.ensure_future(chunks.get())
+                    await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    chunk = getter.result()
+                if chunk is done:
+                    break
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            # Propagar errores del pipeline
+            await producer
+        finally:
+            stopped.set()
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not producer.done():
+                # El hilo acaba en el siguiente token; su resultado ya no interesa
+                producer.add_done_callback(lambda f: f.cancelled() or f.exception())
 
 class MockLLM(BaseLLM):
     """LLM mock completamente compatible con LangChain para desarrollo sin API key"""
@@ -399,6 +716,30 @@ class MockLLM(BaseLLM):
         """Versión asíncrona de _call"""
         return self._call(prompt, stop, run_manager, **kwargs)
     
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """Versión asíncrona de _generate: el mock es inmediato, no necesita hilos"""
+        return self._generate(prompts, stop, **kwargs)
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Emitir la respuesta mock palabra a palabra para simular streaming"""
+        for token in re.findall(r"\S+\s*|\s+", self._generate_mock_response(prompt)):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+    
     @property
     def _identifying_params(self) -> Mapping[str, Any]:
         """Parámetros que identifican el modelo"""
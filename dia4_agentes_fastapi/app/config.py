@@ -3,7 +3,7 @@ Configuración de la aplicación - Día 4
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -83,6 +83,154 @@ class Settings(BaseSettings):
         default=45,
         description="Timeout del agente en segundos"
     )
+    disconnect_poll_interval: float = Field(
+        default=0.5,
+        description="Segundos entre comprobaciones de desconexión del cliente"
+    )
+    
+    # Execution Pools
+    llm_pool_workers: int = Field(
+        default=4,
+        description="Hilos dedicados a la ejecución del agente/LLM"
+    )
+    llm_pool_queue_depth: int = Field(
+        default=16,
+        description="Consultas en espera en el pool del LLM antes de rechazar"
+    )
+    tool_pool_workers: int = Field(
+        default=8,
+        description="Hilos dedicados a E/S bloqueante de herramientas"
+    )
+    tool_pool_queue_depth: int = Field(
+        default=32,
+        description="Llamadas en espera en el pool de herramientas antes de rechazar"
+    )
+    
+    # Tool Execution
+    agent_parallel_tools: bool = Field(
+        default=False,
+        description="Modo planificación: permitir varias acciones independientes por turno, ejecutadas en paralelo"
+    )
+    tool_max_concurrency: int = Field(
+        default=4,
+        description="Llamadas a herramientas simultáneas como máximo"
+    )
+    tool_timeout: float = Field(
+        default=15.0,
+        description="Timeout por defecto de cada llamada a herramienta, en segundos"
+    )
+    tool_timeouts: Dict[str, float] = Field(
+        default={},
+        description="Timeout en segundos por herramienta (JSON), p. ej. {\"web_search\": 8}"
+    )
+    circuit_failure_threshold: int = Field(
+        default=3,
+        description="Fallos seguidos que abren el circuito de una herramienta"
+    )
+    circuit_recovery_timeout: float = Field(
+        default=30.0,
+        description="Segundos con el circuito abierto antes de la llamada de prueba"
+    )
+    
+    # Health Checks
+    health_check_timeout: float = Field(
+        default=5.0,
+        description="Timeout en segundos de cada health check de herramienta"
+    )
+    health_check_interval: float = Field(
+        default=30.0,
+        description="Segundos que se reutiliza el estado de salud y periodo del refresco en segundo plano"
+    )
+    
+    # Tool Call Memo
+    tool_call_memo_enabled: bool = Field(
+        default=True,
+        description="Reutilizar observaciones de llamadas idénticas dentro de una misma consulta"
+    )
+    
+    # Tool Result Cache
+    tool_cache_max_entries: int = Field(
+        default=512,
+        description="Resultados máximos en la caché LRU de cada herramienta"
+    )
+    calculator_expression_cache_size: int = Field(
+        default=256,
+        description="Expresiones sympy evaluadas que guarda la calculadora (LRU)"
+    )
+    web_search_backend: str = Field(
+        default="ddgs",
+        description="Backend de búsqueda web: ddgs, http, async_http o mock"
+    )
+    web_search_pool_size: int = Field(
+        default=4,
+        description="Sesiones/conexiones reutilizables del backend de búsqueda (búsquedas simultáneas)"
+    )
+    web_search_timeout: float = Field(
+        default=10.0,
+        description="Timeout en segundos de cada búsqueda web"
+    )
+    web_search_http_url: str = Field(
+        default="http://127.0.0.1:8765",
+        description="URL base del backend de búsqueda HTTP (GET /search)"
+    )
+    web_search_hedge_delay: float = Field(
+        default=0.5,
+        description="Segundos sin respuesta antes de lanzar una petición de respaldo (async_http, 0 = sin hedging)"
+    )
+    web_search_max_retries: int = Field(
+        default=2,
+        description="Reintentos ante errores de red, 429 o 5xx (async_http)"
+    )
+    web_search_retry_backoff: float = Field(
+        default=0.2,
+        description="Base en segundos del backoff exponencial con jitter entre reintentos (async_http)"
+    )
+    web_search_rate_limit: float = Field(
+        default=1.0,
+        description="Búsquedas salientes por segundo como máximo (token bucket)"
+    )
+    web_search_rate_burst: int = Field(
+        default=3,
+        description="Búsquedas salientes seguidas permitidas en ráfaga"
+    )
+    web_search_cache_ttl: int = Field(
+        default=60,
+        description="TTL blando en segundos de los resultados de búsqueda web: después se refrescan en segundo plano"
+    )
+    web_search_cache_hard_ttl: int = Field(
+        default=300,
+        description="TTL duro en segundos: después el resultado deja de servirse y se espera al proveedor"
+    )
+    
+    # Response Cache
+    response_cache_enabled: bool = Field(
+        default=True,
+        description="Cachear respuestas del agente para consultas repetidas"
+    )
+    response_cache_max_entries: int = Field(
+        default=1000,
+        description="Máximo de respuestas en caché (LRU)"
+    )
+    response_cache_default_ttl: int = Field(
+        default=600,
+        description="TTL en segundos de respuestas sin herramientas o con herramientas sin TTL propio"
+    )
+    response_cache_tool_ttls: Dict[str, int] = Field(
+        default={"web_search": 60, "calculator": 86400, "translator": 86400},
+        description="TTL en segundos por herramienta usada, por nombre registrado (JSON); manda la más corta"
+    )
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Reutilizar respuestas de consultas parecidas (requiere sentence-transformers)"
+    )
+    semantic_cache_model: str = Field(
+        default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        description="Modelo local de embeddings para la caché semántica"
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.9,
+        description="Similitud coseno mínima para considerar dos consultas equivalentes"
+    )
     
     class Config:
         env_file = ".env"
@@ -131,5 +279,39 @@ EXPECTED_ENV_VARS = {
     "ENABLE_CALCULATOR": "true", 
     "ENABLE_TRANSLATOR": "true",
     "REQUEST_TIMEOUT": "30",
-    "AGENT_TIMEOUT": "45"
+    "AGENT_TIMEOUT": "45",
+    "DISCONNECT_POLL_INTERVAL": "0.5",
+    "LLM_POOL_WORKERS": "4",
+    "LLM_POOL_QUEUE_DEPTH": "16",
+    "TOOL_POOL_WORKERS": "8",
+    "TOOL_POOL_QUEUE_DEPTH": "32",
+    "AGENT_PARALLEL_TOOLS": "false",
+    "TOOL_MAX_CONCURRENCY": "4",
+    "TOOL_TIMEOUT": "15",
+    "TOOL_TIMEOUTS": "{}",
+    "CIRCUIT_FAILURE_THRESHOLD": "3",
+    "CIRCUIT_RECOVERY_TIMEOUT": "30",
+    "HEALTH_CHECK_TIMEOUT": "5",
+    "HEALTH_CHECK_INTERVAL": "30",
+    "TOOL_CALL_MEMO_ENABLED": "true",
+    "TOOL_CACHE_MAX_ENTRIES": "512",
+    "CALCULATOR_EXPRESSION_CACHE_SIZE": "256",
+    "WEB_SEARCH_BACKEND": "ddgs",
+    "WEB_SEARCH_POOL_SIZE": "4",
+    "WEB_SEARCH_TIMEOUT": "10",
+    "WEB_SEARCH_HTTP_URL": "http://127.0.0.1:8765",
+    "WEB_SEARCH_HEDGE_DELAY": "0.5",
+    "WEB_SEARCH_MAX_RETRIES": "2",
+    "WEB_SEARCH_RETRY_BACKOFF": "0.2",
+    "WEB_SEARCH_RATE_LIMIT": "1",
+    "WEB_SEARCH_RATE_BURST": "3",
+    "WEB_SEARCH_CACHE_TTL": "60",
+    "WEB_SEARCH_CACHE_HARD_TTL": "300",
+    "RESPONSE_CACHE_ENABLED": "true",
+    "RESPONSE_CACHE_MAX_ENTRIES": "1000",
+    "RESPONSE_CACHE_DEFAULT_TTL": "600",
+    "RESPONSE_CACHE_TOOL_TTLS": '{"web_search": 60, "calculator": 86400, "translator": 86400}',
+    "SEMANTIC_CACHE_ENABLED": "false",
+    "SEMANTIC_CACHE_MODEL": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+    "SEMANTIC_CACHE_THRESHOLD": "0.9"
 } 
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Pools de ejecución dedicados para inferencia del LLM y E/S de herramientas
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(RuntimeError):
+    """La cola del pool está llena y no se admiten más tareas"""
+
+# Acumulador de espera en cola de la consulta en curso (ver track_queue_wait)
+_query_wait: ContextVar[Optional[Dict[str, float]]] = ContextVar("query_wait", default=None)
+
+@contextmanager
+def track_queue_wait():
+    """Acumular los segundos de espera en cola de todos los pools usados dentro del bloque"""
+    wait = {"seconds": 0.0}
+    token = _query_wait.set(wait)
+    try:
+        yield wait
+    finally:
+        _query_wait.reset(token)
+
+class BoundedExecutor:
+    """ThreadPoolExecutor con límite de cola y métricas de espera frente a ejecución"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"pool-{name}"
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.total_exec = 0.0
+        self.max_wait = 0.0
+
+    async def run_timed(self, func: Callable, *args, **kwargs) -> Tuple[Any, float, float]:
+        """Ejecutar en el pool y devolver (resultado, segundos en cola, segundos ejecutando)"""
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Pool '{self.name}' saturado ({self.pending} tareas pendientes)"
+                )
+            self.pending += 1
+
+        submitted = time.perf_counter()
+        timing = {}
+
+        def timed_call():
+            timing["start"] = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing["end"] = time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, timed_call)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                if "end" in timing:
+                    wait = timing["start"] - submitted
+                    self.completed += 1
+                    self.total_wait += wait
+                    self.total_exec += timing["end"] - timing["start"]
+                    self.max_wait = max(self.max_wait, wait)
+
+            query_wait = _query_wait.get()
+            if query_wait is not None and "start" in timing:
+                query_wait["seconds"] += timing["start"] - submitted
+
+        return result, timing["start"] - submitted, timing["end"] - timing["start"]
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecutar en el pool y devolver solo el resultado"""
+        result, _, _ = await self.run_timed(func, *args, **kwargs)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener métricas del pool"""
+        completed = self.completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / completed * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_exec_ms": round(self.total_exec / completed * 1000, 2)
+        }
+
+    def shutdown(self):
+        """Cerrar el pool sin esperar tareas en curso"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Pools por nombre, creados bajo demanda según la configuración
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Obtener el pool 'llm' (inferencia) o 'tools' (E/S de herramientas)"""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+
+    settings = get_settings()
+    sizes = {
+        "llm": (settings.llm_pool_workers, settings.llm_pool_queue_depth),
+        "tools": (settings.tool_pool_workers, settings.tool_pool_queue_depth)
+    }
+    if name not in sizes:
+        raise ValueError(f"Pool desconocido: {name}")
+
+    with _executors_lock:
+        if name not in _executors:
+            max_workers, max_queue = sizes[name]
+            _executors[name] = BoundedExecutor(name, max_workers, max_queue)
+            logger.info(f"[POOL] Pool '{name}' creado: {max_workers} workers, cola {max_queue}")
+        return _executors[name]
+
+def get_executors_stats() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todos los pools creados"""
+    return {name: executor.get_stats() for name, executor in _executors.items()}
+
+def shutdown_executors():
+    """Cerrar todos los pools"""
+    for executor in _executors.values():
+        executor.shutdown()
+    _executors.clear()
@@ -3,8 +3,9 @@ Día 4: Integración de Agentes IA en FastAPI
 Aplicación production-ready con herramientas reales
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 import logging
 import sys
@@ -23,7 +24,9 @@ logger = logging.getLogger(__name__)
 
 # Modelos y endpoints se importarán aquí
 from app.models import AgentRequest, AgentResponse, HealthResponse
-from app.agent_service import AgentService
+from app.agent_service import AgentService, QueryCancelledError
+from app.executors import ExecutorSaturatedError
+from app.streaming import format_sse
 
 # Variables globales para servicios
 agent_service = None
@@ -92,7 +95,9 @@ async def health_check():
             timestamp=datetime.now(),
             services={
                 "agent_service": agent_status,
-                "tools": agent_service.get_tools_status() if agent_service else {}
+                "tools": agent_service.get_tools_status() if agent_service else {},
+                "pools": agent_service.get_pools_status() if agent_service else {},
+                "response_cache": agent_service.get_cache_status() if agent_service else {}
             }
         )
     except Exception as e:
@@ -100,7 +105,7 @@ async def health_check():
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 @app.post("/agent/query", response_model=AgentResponse)
-async def query_agent(request: AgentRequest):
+async def query_agent(request: AgentRequest, http_request: Request):
     """Procesar consulta con el agente IA"""
     try:
         logger.info(f"[REQUEST] Nueva consulta: {request.query[:100]}...")
@@ -111,16 +116,49 @@ async def query_agent(request: AgentRequest):
         response = await agent_service.process_query(
             query=request.query,
             context=request.context,
-            tools=request.tools
+            tools=request.tools,
+            is_disconnected=http_request.is_disconnected
         )
         
         logger.info(f"[RESPONSE] Respuesta generada en {response.processing_time:.2f}s")
         return response
         
+    except HTTPException:
+        raise
+    except QueryCancelledError as e:
+        # Nadie leerá la respuesta; 499 (convención de nginx) solo queda en los logs
+        logger.info(f"[CANCEL] Consulta abandonada por el cliente: {e}")
+        raise HTTPException(status_code=499, detail=str(e))
+    except ExecutorSaturatedError as e:
+        logger.warning(f"[BUSY] Consulta rechazada: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error procesando consulta: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/agent/query/stream")
+async def query_agent_stream(request: AgentRequest):
+    """Procesar consulta emitiendo pasos y tokens como server-sent events"""
+    logger.info(f"[REQUEST] Nueva consulta en streaming: {request.query[:100]}...")
+    
+    if not agent_service or not agent_service.is_initialized:
+        raise HTTPException(status_code=503, detail="Agent service not available")
+    
+    async def event_stream():
+        # Al desconectarse el cliente se cierra el generador y stream_query cancela el agente
+        async for event, data in agent_service.stream_query(
+            query=request.query,
+            context=request.context,
+            tools=request.tools
+        ):
+            yield format_sse(event, data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/agent/tools", response_model=dict)
 async def get_available_tools():
     """Obtener herramientas disponibles"""
@@ -52,6 +52,10 @@ class AgentStep(BaseModel):
     action: Optional[str] = Field(None, description="Acción tomada")
     tool_used: Optional[str] = Field(None, description="Herramienta utilizada")
     observation: Optional[str] = Field(None, description="Resultado de la acción")
+    reused: bool = Field(False, description="Si la observación se reutilizó de una llamada idéntica anterior")
+    started_at: Optional[float] = Field(None, description="Inicio de la herramienta, en segundos desde el inicio de la consulta")
+    wall_time: Optional[float] = Field(None, description="Segundos de ejecución de la herramienta")
+    overlap: Optional[float] = Field(None, description="Segundos en que la herramienta corrió a la vez que otras")
     timestamp: datetime = Field(default_factory=datetime.now)
 
 class AgentResponse(BaseModel):
@@ -93,8 +97,28 @@ class AgentResponse(BaseModel):
         description="Tiempo de procesamiento en segundos"
     )
     
+    queue_time: Optional[float] = Field(
+        None,
+        description="Segundos esperando hueco en los pools de ejecución (LLM y herramientas)"
+    )
+    
+    execution_time: Optional[float] = Field(
+        None,
+        description="Segundos de procesamiento sin contar la espera en cola"
+    )
+    
     success: bool = Field(..., description="Si la consulta fue exitosa")
     
+    cached: bool = Field(
+        False,
+        description="Si la respuesta se sirvió desde la caché de respuestas"
+    )
+    
+    cache_age: Optional[float] = Field(
+        None,
+        description="Segundos desde que se generó la respuesta cacheada"
+    )
+    
     error_message: Optional[str] = Field(
         None,
         description="Mensaje de error si success=False"
@@ -0,0 +1,50 @@
+"""
+Modo planificación: varias acciones independientes por turno del agente ReAct
+"""
+
+import re
+from typing import List, Union
+
+from langchain.agents.output_parsers import ReActSingleInputOutputParser
+from langchain_core.agents import AgentAction, AgentFinish
+
+FINAL_ANSWER_ACTION = "Final Answer:"
+
+# Instrucciones que se añaden al prompt ReAct cuando el modo está activo
+PARALLEL_ACTIONS_INSTRUCTIONS = """
+When several actions are independent of each other (none needs the result of another),
+request them in the same turn, numbered, and they will run in parallel:
+Action 1: the first action, one of [{tool_names}]
+Action Input 1: the input to the first action
+Action 2: the second action, one of [{tool_names}]
+Action Input 2: the input to the second action
+You will then receive one Observation per action, in the same order.
+"""
+
+# "Action N: herramienta" seguido de "Action Input N: entrada" con el mismo N
+_NUMBERED_ACTION = re.compile(
+    r"Action\s*(\d+)\s*:\s*(.*?)\s*\n\s*Action\s*Input\s*\1\s*:\s*(.*?)(?=\n\s*Action\s*\d+\s*:|\n\s*Observation|\Z)",
+    re.DOTALL
+)
+
+class MultiActionReActOutputParser(ReActSingleInputOutputParser):
+    """Parser ReAct que además acepta acciones numeradas y devuelve varias AgentAction"""
+
+    def parse(self, text: str) -> Union[AgentAction, List[AgentAction], AgentFinish]:
+        matches = list(_NUMBERED_ACTION.finditer(text))
+        if len(matches) < 2 or FINAL_ANSWER_ACTION in text:
+            return super().parse(text)
+
+        actions = []
+        for i, match in enumerate(matches):
+            tool = match.group(2).strip()
+            tool_input = match.group(3).strip().strip('"')
+            # El scratchpad concatena el log de cada acción con su observación: la
+            # primera lleva el pensamiento y su acción, las demás solo su acción
+            log = text[:matches[1].start()].rstrip() if i == 0 else match.group(0).strip()
+            actions.append(AgentAction(tool, tool_input, log))
+        return actions
+
+    @property
+    def _type(self) -> str:
+        return "react-multi-input"
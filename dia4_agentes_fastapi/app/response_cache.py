@@ -0,0 +1,218 @@
+"""
+Caché de respuestas del agente: coincidencia exacta y, opcionalmente, semántica
+"""
+
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_settings
+from .executors import get_executor
+from .models import AgentResponse
+
+# Dependencias opcionales del nivel semántico
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+logger = logging.getLogger(__name__)
+
+# Salida de AgentExecutor al agotar iteraciones o tiempo: no es una respuesta cacheable
+AGENT_STOPPED_PREFIX = "Agent stopped due to"
+
+def normalize_text(text: Optional[str]) -> str:
+    """Minúsculas, sin acentos ni puntuación y con espacios colapsados"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s+\-*/^.=()%]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+@dataclass
+class CacheEntry:
+    """Respuesta cacheada con su caducidad"""
+    response: AgentResponse
+    created: float
+    ttl: float
+    scope: str
+    embedding: Any = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.created < self.ttl
+
+class ResponseCache:
+    """LRU de AgentResponse con TTL según las herramientas usadas
+
+    La clave exacta es consulta normalizada + contexto + herramientas pedidas. El
+    nivel semántico compara el embedding de la consulta con las cacheadas del mismo
+    contexto y herramientas, y acepta la más parecida si supera el umbral.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        default_ttl: float,
+        tool_ttls: Dict[str, float],
+        semantic_enabled: bool = False,
+        semantic_model: Optional[str] = None,
+        semantic_threshold: float = 0.9
+    ):
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        # TTL por nombre registrado de la herramienta (web_search, calculator...)
+        self.tool_ttls = tool_ttls
+        # Nombre que ve el agente (DuckDuckGo_Search) -> nombre registrado (ver set_tool_names)
+        self.tool_names: Dict[str, str] = {}
+        self.semantic_threshold = semantic_threshold
+        self.semantic_model = semantic_model
+        self.semantic_enabled = semantic_enabled and SentenceTransformer is not None
+        if semantic_enabled and not self.semantic_enabled:
+            logger.warning("[CACHE] sentence-transformers no disponible, caché semántica desactivada")
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._model = None
+        self._model_lock = asyncio.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+    @staticmethod
+    def _scope(context: Optional[str], tools: Optional[List[Any]]) -> str:
+        tool_names = sorted(getattr(t, "value", str(t)) for t in (tools or []))
+        return f"{normalize_text(context)}|{','.join(tool_names)}"
+
+    def set_tool_names(self, tool_names: Dict[str, str]):
+        """Registrar qué herramienta hay detrás de cada nombre que usa el agente"""
+        self.tool_names = dict(tool_names)
+        unknown = set(self.tool_ttls) - set(self.tool_names.values())
+        if unknown:
+            logger.warning(
+                f"[CACHE] TTL para herramientas no registradas {sorted(unknown)}: "
+                f"se usará el TTL por defecto (registradas: {sorted(set(self.tool_names.values()))})"
+            )
+
+    def ttl_for(self, tools_used: List[str]) -> float:
+        """La respuesta caduca con la herramienta más volátil que usó"""
+        if not tools_used:
+            return self.default_ttl
+        return min(
+            self.tool_ttls.get(self.tool_names.get(tool, tool), self.default_ttl)
+            for tool in tools_used
+        )
+
+    async def _embed(self, text: str):
+        """Embedding normalizado de la consulta, calculado en el pool del LLM"""
+        async with self._model_lock:
+            if self._model is None:
+                logger.info(f"[CACHE] Cargando modelo de embeddings: {self.semantic_model}")
+                self._model = await get_executor("llm").run(SentenceTransformer, self.semantic_model)
+        return await get_executor("llm").run(
+            self._model.encode, text, normalize_embeddings=True
+        )
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if not entry.is_fresh(now)]
+        for key in expired:
+            del self._entries[key]
+        self.stats["expired"] += len(expired)
+
+    async def lookup(
+        self,
+        query: str,
+        context: Optional[str],
+        tools: Optional[List[Any]]
+    ) -> Tuple[Optional[AgentResponse], Optional[float], Any]:
+        """Buscar respuesta; devuelve (respuesta, edad en segundos, embedding calculado)"""
+        now = time.time()
+        scope = self._scope(context, tools)
+        key = f"{normalize_text(query)}|{scope}"
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.is_fresh(now):
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.response, now - entry.created, None
+            # Caducada: liberar su hueco en la LRU en vez de esperar a que la expulsen
+            del self._entries[key]
+            self.stats["expired"] += 1
+
+        embedding = None
+        if self.semantic_enabled:
+            self._evict_expired(now)
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e.scope == scope and e.embedding is not None
+            ]
+            embedding = await self._embed(normalize_text(query))
+            if candidates:
+                similarities = np.stack([e.embedding for _, e in candidates]) @ embedding
+                best = int(similarities.argmax())
+                if similarities[best] >= self.semantic_threshold:
+                    best_key, best_entry = candidates[best]
+                    self._entries.move_to_end(best_key)
+                    self.stats["semantic_hits"] += 1
+                    logger.info(f"[CACHE] Acierto semántico (similitud {similarities[best]:.3f})")
+                    return best_entry.response, now - best_entry.created, embedding
+
+        self.stats["misses"] += 1
+        return None, None, embedding
+
+    def store(
+        self,
+        query: str,
+        context: Optional[str],
+        tools: Optional[List[Any]],
+        response: AgentResponse,
+        embedding: Any = None
+    ):
+        """Guardar una respuesta exitosa"""
+        if not response.success or response.response.startswith(AGENT_STOPPED_PREFIX):
+            return
+        ttl = self.ttl_for(response.tools_used)
+        if ttl <= 0:
+            return
+
+        scope = self._scope(context, tools)
+        key = f"{normalize_text(query)}|{scope}"
+        self._entries[key] = CacheEntry(response, time.time(), ttl, scope, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.stats["stores"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la caché"""
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "semantic_enabled": self.semantic_enabled,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            **self.stats
+        }
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Crear la caché según la configuración (None si está desactivada)"""
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return None
+    return ResponseCache(
+        max_entries=settings.response_cache_max_entries,
+        default_ttl=settings.response_cache_default_ttl,
+        tool_ttls=settings.response_cache_tool_ttls,
+        semantic_enabled=settings.semantic_cache_enabled,
+        semantic_model=settings.semantic_cache_model,
+        semantic_threshold=settings.semantic_cache_threshold
+    )
@@ -0,0 +1,82 @@
+"""
+Memoización de llamadas a herramientas dentro de una misma ejecución del agente
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from .tools.base import is_error_observation
+
+logger = logging.getLogger(__name__)
+
+ToolCallKey = Tuple[str, str]
+
+class RunMemo:
+    """Memo de una ejecución y registro de qué llamadas se sirvieron desde ella"""
+
+    def __init__(self):
+        # (herramienta, entrada normalizada) -> tarea
+        self.tasks: Dict[ToolCallKey, "asyncio.Future[Any]"] = {}
+        # Cada llamada en el orden en que empezó: (clave, reutilizada)
+        self.calls: List[Tuple[ToolCallKey, bool]] = []
+        # run_id de LangChain de cada llamada -> reutilizada (para el streaming)
+        self.runs: Dict[UUID, bool] = {}
+
+_run_memo: ContextVar[Optional[RunMemo]] = ContextVar("run_memo", default=None)
+
+def tool_call_key(tool_name: str, tool_input: Any) -> ToolCallKey:
+    """Clave de una llamada: mismo Action y mismo Action Input salvo espacios"""
+    return tool_name, " ".join(str(tool_input).split())
+
+@contextmanager
+def run_memo_scope():
+    """Abrir una memo nueva para las tareas creadas dentro del bloque y devolverla"""
+    memo = RunMemo()
+    token = _run_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _run_memo.reset(token)
+
+def reused_run(run_id: Optional[UUID]) -> bool:
+    """Si la llamada con ese run_id de LangChain se sirvió desde la memo"""
+    memo = _run_memo.get()
+    return memo is not None and run_id is not None and memo.runs.get(run_id, False)
+
+def memoize_tool(tool_name: str, coroutine: Callable[[str], Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+    """Envolver la corutina de una herramienta para no repetir llamadas idénticas en la misma ejecución"""
+    async def run(tool_input: str, callbacks: Any = None) -> str:
+        memo = _run_memo.get()
+        if memo is None:
+            return await coroutine(tool_input)
+
+        key = tool_call_key(tool_name, tool_input)
+        reused = key in memo.tasks
+        if reused:
+            logger.info(f"[MEMO] Reutilizando observación de '{tool_name}' en esta ejecución")
+        else:
+            # Guardar la tarea y no el resultado: llamadas simultáneas también se comparten
+            memo.tasks[key] = asyncio.ensure_future(coroutine(tool_input))
+        memo.calls.append((key, reused))
+        # Tool pasa como callbacks el gestor hijo de la ejecución: su padre es el run_id
+        run_id = getattr(callbacks, "parent_run_id", None)
+        if run_id is not None:
+            memo.runs[run_id] = reused
+        task = memo.tasks[key]
+        try:
+            result = await task
+        except BaseException:
+            # No memorizar fallos ni cancelaciones: un reintento debe volver a ejecutar
+            if task.done() and memo.tasks.get(key) is task:
+                memo.tasks.pop(key, None)
+            raise
+        # ToolManager devuelve los fallos y timeouts como observación: tampoco se memorizan
+        if is_error_observation(result) and memo.tasks.get(key) is task:
+            memo.tasks.pop(key, None)
+        return result
+
+    return run
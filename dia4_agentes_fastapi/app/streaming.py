@@ -0,0 +1,121 @@
+"""
+Streaming del razonamiento del agente como server-sent events
+"""
+
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.agents import AgentAction
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from .models import AgentStep
+from .run_memo import reused_run
+
+logger = logging.getLogger(__name__)
+
+# Marca del formato ReAct a partir de la cual los tokens son la respuesta final
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serializar un evento en formato SSE"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+class AgentStreamHandler(AsyncCallbackHandler):
+    """Callback de LangChain que publica pasos, observaciones y tokens en una cola"""
+
+    def __init__(self, memo_enabled: bool = True):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # Sin memo cada llamada repetida se ejecuta de nuevo: no marcarla como reutilizada
+        self.memo_enabled = memo_enabled
+        self.steps: List[AgentStep] = []
+        # Con acciones en paralelo las herramientas terminan en cualquier orden
+        self._pending_steps: List[AgentStep] = []
+        self._steps_by_run: Dict[UUID, AgentStep] = {}
+        self._llm_buffer = ""
+        self._in_final_answer = False
+
+    async def _emit(self, event: str, data: Dict[str, Any]):
+        await self.queue.put((event, data))
+
+    async def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any):
+        """Cada llamada al LLM empieza un nuevo bloque Thought/Action"""
+        self._llm_buffer = ""
+        self._in_final_answer = False
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any):
+        """Emitir tokens de razonamiento y, tras 'Final Answer:', de la respuesta final"""
+        if self._in_final_answer:
+            await self._emit("answer", {"text": token})
+            return
+
+        self._llm_buffer += token
+        marker = self._llm_buffer.find(FINAL_ANSWER_MARKER)
+        if marker == -1:
+            await self._emit("token", {"text": token})
+            return
+
+        # El marcador puede llegar partido entre tokens: separar lo que va antes y después
+        self._in_final_answer = True
+        before = self._llm_buffer[:marker + len(FINAL_ANSWER_MARKER)]
+        already_sent = len(self._llm_buffer) - len(token)
+        if len(before) > already_sent:
+            await self._emit("token", {"text": before[already_sent:]})
+        answer = self._llm_buffer[marker + len(FINAL_ANSWER_MARKER):].lstrip()
+        if answer:
+            await self._emit("answer", {"text": answer})
+
+    async def on_agent_action(self, action: AgentAction, **kwargs: Any):
+        """Emitir el paso (pensamiento y acción) antes de ejecutar la herramienta
+        
+        Si se reutilizó desde la memo solo se sabe al terminar: va en el evento observation.
+        """
+        step = AgentStep(
+            step_number=len(self.steps) + 1,
+            thought=action.log,
+            action=action.tool,
+            tool_used=action.tool
+        )
+        self.steps.append(step)
+        self._pending_steps.append(step)
+        await self._emit("step", step.model_dump(mode="json"))
+
+    async def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any):
+        """Asociar la ejecución de la herramienta con su paso pendiente"""
+        name = (serialized or {}).get("name")
+        step = next((s for s in self._pending_steps if s.tool_used == name), None)
+        if step is None and self._pending_steps:
+            step = self._pending_steps[0]
+        if step is not None:
+            self._pending_steps.remove(step)
+            self._steps_by_run[run_id] = step
+
+    def _step_for(self, run_id: Optional[UUID]) -> Optional[AgentStep]:
+        step = self._steps_by_run.pop(run_id, None) if run_id is not None else None
+        return step or (self.steps[-1] if self.steps else None)
+
+    async def on_tool_end(self, output: Any, *, run_id: Optional[UUID] = None, **kwargs: Any):
+        """Emitir la observación del paso correspondiente"""
+        step = self._step_for(run_id)
+        if step is None:
+            return
+        step.observation = str(output) if output else None
+        step.reused = self.memo_enabled and reused_run(run_id)
+        await self._emit("observation", {
+            "step_number": step.step_number,
+            "observation": step.observation,
+            "reused": step.reused
+        })
+
+    async def on_tool_error(self, error: BaseException, *, run_id: Optional[UUID] = None, **kwargs: Any):
+        """Emitir el error de herramienta como observación"""
+        step = self._step_for(run_id)
+        if step is None:
+            return
+        await self._emit("observation", {
+            "step_number": step.step_number,
+            "observation": None,
+            "error": str(error)
+        })
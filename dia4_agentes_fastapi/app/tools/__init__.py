@@ -2,7 +2,25 @@
 Herramientas para el agente IA - Día 4
 """
 
-from .base import BaseTool, ToolManager
+from typing import Optional
+
+from .base import BaseTool, ToolManager, deadline_scope, remaining_budget, tool_timing_scope
+from .cache import ToolResultCache, StaleWhileRevalidateCache
+from .resilience import (
+    TokenBucket,
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimitExceededError
+)
+from .search_backends import (
+    SearchBackend,
+    DDGSSearchBackend,
+    HTTPSearchBackend,
+    AsyncHTTPSearchBackend,
+    MockSearchBackend,
+    create_search_backend
+)
+from .adapters import LangChainToolAdapter, BackgroundLoop, shutdown_background_loop
 from .web_search import WebSearchTool, WebSearchLangChainTool
 from .calculator import CalculatorTool, CalculatorLangChainTool
 from .translator import TranslatorTool, TranslatorLangChainTool
@@ -13,6 +31,25 @@ __all__ = [
     # Clases base
     "BaseTool",
     "ToolManager",
+    "deadline_scope",
+    "remaining_budget",
+    "tool_timing_scope",
+    "ToolResultCache",
+    "StaleWhileRevalidateCache",
+    
+    # Resiliencia
+    "TokenBucket",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RateLimitExceededError",
+    
+    # Backends de búsqueda web
+    "SearchBackend",
+    "DDGSSearchBackend",
+    "HTTPSearchBackend",
+    "AsyncHTTPSearchBackend",
+    "MockSearchBackend",
+    "create_search_backend",
     
     # Herramientas personalizadas
     "WebSearchTool",
@@ -21,6 +58,9 @@ __all__ = [
     "SentimentAnalyzerTool",  # 🎓 NUEVA: Análisis de sentimientos
     
     # Adaptadores para LangChain
+    "LangChainToolAdapter",
+    "BackgroundLoop",
+    "shutdown_background_loop",
     "WebSearchLangChainTool",
     "CalculatorLangChainTool",
     "TranslatorLangChainTool"
@@ -40,11 +80,18 @@ def create_tool_manager() -> ToolManager:
     
     return manager
 
-def create_langchain_tools() -> list:
-    """Crear herramientas compatibles con LangChain"""
+def create_langchain_tools(manager: Optional[ToolManager] = None) -> list:
+    """Crear herramientas compatibles con LangChain
+    
+    Si se pasa el gestor, los adaptadores reutilizan sus instancias para que
+    estadísticas y estado de salud sean los mismos que ve /agent/tools, y las
+    llamadas async pasan por ToolManager.execute (concurrencia y timeouts).
+    """
+    get_tool = manager.get_tool if manager else lambda name: None
     # TODO: Crear adaptador LangChain para SentimentAnalyzerTool
     return [
-        WebSearchLangChainTool(),
-        CalculatorLangChainTool(),
-        TranslatorLangChainTool()
-    ] 
\ No newline at end of file
+        WebSearchLangChainTool(get_tool("web_search"), manager),
+        CalculatorLangChainTool(get_tool("calculator"), manager),
+        TranslatorLangChainTool(get_tool("translator"), manager)
+    ]
+ 
\ No newline at end of file
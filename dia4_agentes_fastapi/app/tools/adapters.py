@@ -0,0 +1,103 @@
+"""
+Adaptadores de herramientas para LangChain con un event loop persistente
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+from .base import BaseTool, ToolManager, deadline_scope, remaining_budget, tool_error_observation
+
+logger = logging.getLogger(__name__)
+
+class BackgroundLoop:
+    """Event loop de larga duración en un hilo propio para ejecutar corutinas desde código síncrono"""
+
+    def __init__(self, name: str = "tools-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Arrancar el loop la primera vez que se necesita"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run_forever():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+                logger.info(f"[LOOP] Event loop de fondo '{self.name}' iniciado")
+            return self._loop
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Ejecutar una corutina en el loop de fondo y esperar su resultado"""
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("No se puede esperar de forma síncrona desde el propio loop de fondo")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def shutdown(self):
+        """Detener el loop y su hilo"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+        logger.info(f"[LOOP] Event loop de fondo '{self.name}' detenido")
+
+# Loop compartido por todos los adaptadores
+background_loop = BackgroundLoop()
+
+class LangChainToolAdapter:
+    """Adaptador genérico de BaseTool con entradas sync y async para LangChain"""
+
+    def __init__(self, tool: BaseTool, name: Optional[str] = None, manager: Optional[ToolManager] = None):
+        self.tool = tool
+        self.name = name or tool.name
+        self.description = tool.description
+        self.manager = manager
+
+    async def arun(self, input_data: str) -> str:
+        """Método async para LangChain: usa el loop del llamante"""
+        if self.manager is not None:
+            # Concurrencia limitada, timeout por herramienta y registro de tiempos
+            return await self.manager.execute(self.tool.name, input_data)
+        return await self._run_tool(input_data)
+
+    def run(self, input_data: str) -> str:
+        """Método sync para LangChain: usa el loop de fondo, sin crear loops por llamada"""
+        # El loop de fondo no hereda el contexto del llamante: trasladar el presupuesto
+        budget = remaining_budget()
+        return background_loop.run(self._run_with_budget(input_data, budget), timeout=budget)
+
+    async def _run_with_budget(self, input_data: str, budget: Optional[float]) -> str:
+        with deadline_scope(budget):
+            return await self._run_tool(input_data)
+
+    async def _run_tool(self, input_data: str) -> str:
+        """Ejecutar la herramienta devolviendo los fallos como observación para el agente"""
+        try:
+            return await self.tool.run(input_data)
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            return tool_error_observation(self.tool.name, e)
+
+def shutdown_background_loop():
+    """Detener el loop de fondo compartido"""
+    background_loop.shutdown()
@@ -3,21 +3,114 @@ Clase base para herramientas del agente IA
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
 import logging
+import time
+
+from .cache import ToolResultCache
+from .resilience import CircuitBreaker, CircuitOpenError, RateLimitExceededError
+from ..config import get_settings
+from ..executors import ExecutorSaturatedError, get_executor
 
 logger = logging.getLogger(__name__)
 
+# Instante (time.monotonic) en que vence la consulta en curso, si tiene límite
+_deadline: ContextVar[Optional[float]] = ContextVar("tool_deadline", default=None)
+
+@contextmanager
+def deadline_scope(seconds: Optional[float], detached: bool = False):
+    """Fijar un límite de tiempo para las herramientas ejecutadas dentro del bloque
+    
+    Un límite anidado nunca amplía el exterior. Con None el bloque no cambia nada.
+    Con detached=True se ignora el límite exterior: para tareas en segundo plano
+    que sobreviven a la consulta que las lanzó.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and not detached:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+# Tiempos de las llamadas a herramientas de la ejecución en curso (ver ToolManager.execute)
+_call_timings: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("tool_call_timings", default=None)
+
+@contextmanager
+def tool_timing_scope():
+    """Registrar en la lista devuelta el inicio y fin de cada ToolManager.execute del bloque"""
+    timings: List[Dict[str, Any]] = []
+    token = _call_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _call_timings.reset(token)
+
+def remaining_budget() -> Optional[float]:
+    """Segundos que le quedan a la consulta en curso (None si no tiene límite)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+def tool_error_observation(name: str, error: Exception) -> str:
+    """Convertir el error de una herramienta en una observación para el agente"""
+    return f"Error: '{name}' no disponible: {error}"
+
+def is_error_observation(observation: Any) -> bool:
+    """Si una observación es un fallo devuelto como texto (error, circuito abierto o timeout)"""
+    return isinstance(observation, str) and observation.startswith("Error: '")
+
 class BaseTool(ABC):
-    """Clase base para todas las herramientas del agente"""
+    """Clase base para todas las herramientas del agente
+    
+    Caché declarativa: las subclases activan `cacheable`, fijan `cache_ttl` en
+    segundos (None = sin caducidad, solo LRU) y pueden redefinir `cache_key()` para
+    normalizar la entrada y `_is_cacheable_result()` para no guardar errores.
+    
+    La disponibilidad la decide un circuit breaker: tras varios fallos seguidos la
+    herramienta se deshabilita durante un tiempo y después se prueba de nuevo, en
+    lugar de quedar marcada como no disponible hasta reiniciar.
+    """
+    
+    cacheable: bool = False
+    cache_ttl: Optional[float] = None
     
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         self.last_used: Optional[datetime] = None
         self.usage_count = 0
-        self.is_available = True
+        settings = get_settings()
+        self.breaker = CircuitBreaker(
+            name,
+            settings.circuit_failure_threshold,
+            settings.circuit_recovery_timeout
+        )
+        self.cache: Optional[ToolResultCache] = (
+            ToolResultCache(settings.tool_cache_max_entries) if self.cacheable else None
+        )
+    
+    @property
+    def is_available(self) -> bool:
+        """Disponible salvo con el circuito abierto (half_open admite la llamada de prueba)"""
+        return self.breaker.state != CircuitBreaker.OPEN
+    
+    @is_available.setter
+    def is_available(self, value: bool):
+        if value:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
         
     @abstractmethod
     async def execute(self, input_data: str) -> str:
@@ -29,6 +122,29 @@ class BaseTool(ABC):
         """Verificar si la herramienta está funcionando correctamente"""
         pass
     
+    def close(self):
+        """Liberar recursos (conexiones, sesiones); por defecto no hace nada"""
+        pass
+    
+    def cache_key(self, input_data: str) -> str:
+        """Normalizar la entrada para la caché (por defecto, espacios colapsados)"""
+        return " ".join(input_data.split())
+    
+    def _is_cacheable_result(self, result: str) -> bool:
+        """Decidir si un resultado se guarda en caché"""
+        return True
+    
+    def _get_cached(self, input_data: str) -> Optional[str]:
+        """Resultado cacheado para la entrada o None (las subclases pueden cambiar la política)"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache_key(input_data))
+    
+    def _set_cached(self, input_data: str, result: str):
+        """Guardar un resultado si la herramienta cachea y el resultado es válido"""
+        if self.cache is not None and self._is_cacheable_result(result):
+            self.cache.set(self.cache_key(input_data), result, self.cache_ttl)
+    
     def get_info(self) -> Dict[str, Any]:
         """Obtener información sobre la herramienta"""
         return {
@@ -36,7 +152,11 @@ class BaseTool(ABC):
             "description": self.description,
             "last_used": self.last_used.isoformat() if self.last_used else None,
             "usage_count": self.usage_count,
-            "is_available": self.is_available
+            "is_available": self.is_available,
+            "circuit": self.breaker.get_stats(),
+            "cache": (
+                {"ttl": self.cache_ttl, **self.cache.get_stats()} if self.cache else None
+            )
         }
     
     async def run(self, input_data: str) -> str:
@@ -44,7 +164,33 @@ class BaseTool(ABC):
         try:
             logger.info(f"[TOOL] Ejecutando herramienta '{self.name}' con entrada: {input_data[:100]}...")
             
-            result = await self.execute(input_data)
+            cached = self._get_cached(input_data)
+            if cached is not None:
+                self.last_used = datetime.now()
+                self.usage_count += 1
+                logger.info(f"[CACHE] Herramienta '{self.name}' servida desde caché")
+                return cached
+            
+            # Respetar el presupuesto restante de la consulta
+            budget = remaining_budget()
+            if budget is not None and budget <= 0:
+                raise asyncio.TimeoutError(f"Sin tiempo restante para '{self.name}'")
+            
+            # Circuito abierto: no llamar a una herramienta que está fallando
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(self.name, self.breaker.retry_in())
+            try:
+                result = await asyncio.wait_for(self.execute(input_data), budget)
+            except (asyncio.TimeoutError, asyncio.CancelledError, RateLimitExceededError):
+                # Límite de la consulta o limitador propio: no es un fallo de la herramienta
+                self.breaker.release()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            
+            self._set_cached(input_data, result)
             
             # Actualizar estadísticas
             self.last_used = datetime.now()
@@ -53,9 +199,15 @@ class BaseTool(ABC):
             logger.info(f"[SUCCESS] Herramienta '{self.name}' ejecutada exitosamente")
             return result
             
+        except asyncio.TimeoutError:
+            # Agotar el plazo de la consulta no indica que la herramienta esté caída
+            logger.warning(f"[TIMEOUT] Herramienta '{self.name}' cortada por el límite de la consulta")
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"[CIRCUIT] {e}")
+            raise
         except Exception as e:
             logger.error(f"❌ Error ejecutando herramienta '{self.name}': {e}")
-            self.is_available = False
             raise e
 
 class ToolManager:
@@ -63,6 +215,19 @@ class ToolManager:
     
     def __init__(self):
         self.tools: Dict[str, BaseTool] = {}
+        settings = get_settings()
+        self.max_concurrency = max(1, settings.tool_max_concurrency)
+        self.default_timeout = settings.tool_timeout
+        self.tool_timeouts: Dict[str, float] = dict(settings.tool_timeouts)
+        # Un semáforo por event loop: el manager puede usarse desde varios loops
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        # Estado de salud cacheado y refresco en segundo plano
+        self.health_check_timeout = settings.health_check_timeout
+        self.health_check_interval = settings.health_check_interval
+        self._health: Dict[str, bool] = {}
+        self._health_checked_at: Optional[float] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._health_refresher: Optional[asyncio.Task] = None
         logger.info("[MANAGER] ToolManager inicializado")
     
     def register_tool(self, tool: BaseTool):
@@ -74,6 +239,58 @@ class ToolManager:
         """Obtener una herramienta por nombre"""
         return self.tools.get(name)
     
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+    
+    async def execute(self, name: str, input_data: str) -> str:
+        """Ejecutar una herramienta con límite de concurrencia y timeout propio
+        
+        Varias llamadas lanzadas con asyncio.gather se ejecutan en paralelo hasta
+        tool_max_concurrency. El timeout de la herramienta se combina con el
+        presupuesto restante de la consulta (gana el menor).
+        """
+        tool = self.get_tool(name)
+        if tool is None:
+            raise ValueError(f"Herramienta desconocida: {name}")
+        
+        timeout = self.tool_timeouts.get(name, self.default_timeout)
+        async with self._semaphore():
+            start = time.perf_counter()
+            try:
+                with deadline_scope(timeout):
+                    return await tool.run(input_data)
+            except asyncio.TimeoutError:
+                budget = remaining_budget()
+                if budget is not None and budget <= 0:
+                    # Venció la consulta completa: que el agente se detenga
+                    raise
+                # Venció solo esta herramienta: el agente recibe la observación y sigue
+                return f"Error: '{name}' no respondió en {timeout:g}s"
+            except Exception as e:
+                # Fallo, circuito abierto o límite de tasa: también como observación
+                return tool_error_observation(name, e)
+            finally:
+                timings = _call_timings.get()
+                if timings is not None:
+                    timings.append({
+                        "tool": name,
+                        "input": input_data,
+                        "start": start,
+                        "end": time.perf_counter()
+                    })
+    
+    def close_all(self):
+        """Liberar los recursos de todas las herramientas"""
+        for name, tool in self.tools.items():
+            try:
+                tool.close()
+            except Exception as e:
+                logger.error(f"Error cerrando herramienta '{name}': {e}")
+    
     def get_available_tools(self) -> Dict[str, BaseTool]:
         """Obtener todas las herramientas disponibles"""
         return {name: tool for name, tool in self.tools.items() if tool.is_available}
@@ -82,16 +299,90 @@ class ToolManager:
         """Obtener información de todas las herramientas"""
         return {name: tool.get_info() for name, tool in self.tools.items()}
     
-    async def health_check_all(self) -> Dict[str, bool]:
-        """Verificar el estado de todas las herramientas"""
-        results = {}
-        for name, tool in self.tools.items():
-            try:
-                results[name] = tool.health_check()
-                tool.is_available = results[name]
-            except Exception as e:
-                logger.error(f"Error en health check de '{name}': {e}")
-                results[name] = False
-                tool.is_available = False
+    async def _check_tool(self, name: str, tool: BaseTool) -> Optional[bool]:
+        """health_check() síncrono en el pool de herramientas, con timeout (None = sin veredicto)"""
+        try:
+            return bool(await asyncio.wait_for(
+                get_executor("tools").run(tool.health_check),
+                self.health_check_timeout
+            ))
+        except asyncio.TimeoutError:
+            logger.error(f"Health check de '{name}' superó {self.health_check_timeout:g}s")
+            return False
+        except (RateLimitExceededError, ExecutorSaturatedError) as e:
+            # Sin token o con el pool lleno no se sabe nada de la herramienta
+            logger.info(f"[HEALTH] '{name}' sin comprobar: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error en health check de '{name}': {e}")
+            return False
+    
+    async def _run_health_checks(self) -> Dict[str, bool]:
+        """Verificar todas las herramientas a la vez, fuera del event loop"""
+        names = list(self.tools)
+        statuses = await asyncio.gather(*(self._check_tool(name, self.tools[name]) for name in names))
+        results = dict(zip(names, statuses))
+        for name, status in results.items():
+            tool = self.tools[name]
+            # Cuentan como llamadas: uno correcto cierra el circuito y los fallidos suman
+            # hacia circuit_failure_threshold; sin veredicto se mantiene el estado actual
+            if status is None:
+                results[name] = tool.is_available
+            else:
+                tool.is_available = status
+        self._health = results
+        self._health_checked_at = time.monotonic()
+        return results
+    
+    async def health_check_all(self, max_age: Optional[float] = None) -> Dict[str, bool]:
+        """Verificar el estado de todas las herramientas
+        
+        Devuelve el resultado cacheado si tiene menos de max_age segundos (por
+        defecto health_check_interval). Llamadas simultáneas comparten una sola
+        ronda de comprobaciones.
+        """
+        max_age = self.health_check_interval if max_age is None else max_age
+        age = self.health_age()
+        if age is not None and age < max_age:
+            return dict(self._health)
+        
+        loop = asyncio.get_running_loop()
+        if self._health_task is None or self._health_task.done() or self._health_task.get_loop() is not loop:
+            self._health_task = asyncio.ensure_future(self._run_health_checks())
+        return dict(await asyncio.shield(self._health_task))
+    
+    def health_age(self) -> Optional[float]:
+        """Segundos desde la última ronda de comprobaciones (None si no hubo ninguna)"""
+        if self._health_checked_at is None:
+            return None
+        return time.monotonic() - self._health_checked_at
+    
+    def get_cached_health(self) -> Dict[str, bool]:
+        """Último estado conocido, sin comprobar nada"""
+        return dict(self._health)
+    
+    def start_health_refresher(self):
+        """Refrescar el estado de salud en segundo plano cada health_check_interval"""
+        if self._health_refresher is not None and not self._health_refresher.done():
+            return
         
-        return results 
\ No newline at end of file
+        async def refresh_forever():
+            while True:
+                await asyncio.sleep(self.health_check_interval)
+                try:
+                    await self.health_check_all(max_age=0)
+                except Exception as e:
+                    logger.error(f"[HEALTH] Error refrescando health checks: {e}")
+        
+        self._health_refresher = asyncio.create_task(refresh_forever())
+        logger.info(f"[HEALTH] Refresco de health checks cada {self.health_check_interval:g}s")
+    
+    async def stop_health_refresher(self):
+        """Detener el refresco en segundo plano"""
+        if self._health_refresher is not None:
+            self._health_refresher.cancel()
+            try:
+                await self._health_refresher
+            except asyncio.CancelledError:
+                pass
+            self._health_refresher = None 
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Caché LRU con TTL para resultados de herramientas
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+class ToolResultCache:
+    """LRU acotada de resultados por clave, con TTL opcional por entrada"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        # Las herramientas también se ejecutan desde el loop de fondo de los adaptadores
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtener un resultado vigente o None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Guardar un resultado; ttl=None no caduca (solo sale por LRU)"""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired
+        }
+
+class StaleWhileRevalidateCache(ToolResultCache):
+    """Caché stale-while-revalidate: TTL blando para refrescar y TTL duro para caducar
+
+    Hasta `soft_ttl` la entrada está fresca; entre `soft_ttl` y `hard_ttl` está
+    obsoleta pero se sigue sirviendo mientras alguien la refresca en segundo plano;
+    pasado `hard_ttl` desaparece y la siguiente llamada espera al proveedor.
+    """
+
+    def __init__(self, max_entries: int, soft_ttl: float, hard_ttl: float):
+        super().__init__(max_entries)
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(soft_ttl, hard_ttl)
+        self._refreshing: Set[str] = set()
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Guardar con su instante de creación; caduca a los hard_ttl segundos"""
+        super().set(key, (value, time.monotonic()), self.hard_ttl if ttl is None else ttl)
+
+    def get_with_age(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Obtener (valor, edad en segundos) si no ha pasado el TTL duro"""
+        item = super().get(key)
+        if item is None:
+            return None
+        value, stored_at = item
+        age = time.monotonic() - stored_at
+        if age >= self.soft_ttl:
+            with self._lock:
+                self.stale_hits += 1
+        return value, age
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self.get_with_age(key)
+        return item[0] if item is not None else None
+
+    def is_stale(self, age: float) -> bool:
+        return age >= self.soft_ttl
+
+    def begin_refresh(self, key: str) -> bool:
+        """Reservar el refresco de una clave; False si ya hay uno en curso"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, key: str, ok: bool = True):
+        with self._lock:
+            self._refreshing.discard(key)
+            if not ok:
+                self.refresh_errors += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "soft_ttl": self.soft_ttl,
+            "hard_ttl": self.hard_ttl,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing)
+        }
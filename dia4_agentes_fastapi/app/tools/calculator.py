@@ -3,17 +3,106 @@ Herramienta de calculadora avanzada usando sympy
 """
 
 import re
+import ast
 import math
 import logging
-from typing import Union
+import operator
+from typing import Any, Dict, Optional, Union
 import sympy as sp
 from sympy import sympify, latex
-from .base import BaseTool
+from .base import BaseTool, ToolManager
+from .adapters import LangChainToolAdapter
+from .cache import ToolResultCache
+from ..config import get_settings
+from ..executors import get_executor
 
 logger = logging.getLogger(__name__)
 
+# Ruta rápida: aritmética y funciones numéricas con la misma semántica que sympy
+_FAST_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_FAST_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_FAST_CONSTANTS = {"pi": math.pi, "e": math.e, "E": math.e}
+_FAST_FUNCTIONS = {
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "abs": abs,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+}
+# Exponentes y enteros mayores se dejan a sympy, en el pool de herramientas: un
+# exponente acotado no basta, (9**999)**999 construiría un entero de millones de bits
+_FAST_MAX_EXPONENT = 1000
+_FAST_MAX_INT_BITS = 4096
+
+def _check_int_size(op: ast.operator, left: Union[int, float], right: Union[int, float]):
+    """Estimar los bits del resultado entero antes de multiplicar o elevar"""
+    if not (isinstance(left, int) and isinstance(right, int)):
+        return
+    if isinstance(op, ast.Mult):
+        bits = left.bit_length() + right.bit_length()
+    elif isinstance(op, ast.Pow) and right > 0:
+        bits = left.bit_length() * right
+    else:
+        return
+    if bits > _FAST_MAX_INT_BITS:
+        raise ValueError("entero demasiado grande para la ruta rápida")
+
+def _fast_eval_node(node: ast.AST) -> Union[int, float]:
+    if isinstance(node, ast.Expression):
+        return _fast_eval_node(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in _FAST_CONSTANTS:
+        return _FAST_CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _FAST_UNARY_OPS:
+        return _FAST_UNARY_OPS[type(node.op)](_fast_eval_node(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _FAST_BINARY_OPS:
+        left, right = _fast_eval_node(node.left), _fast_eval_node(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > _FAST_MAX_EXPONENT:
+            raise ValueError("exponente demasiado grande para la ruta rápida")
+        _check_int_size(node.op, left, right)
+        return _FAST_BINARY_OPS[type(node.op)](left, right)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FAST_FUNCTIONS and not node.keywords):
+        return _FAST_FUNCTIONS[node.func.id](*(_fast_eval_node(arg) for arg in node.args))
+    raise ValueError(f"nodo no numérico: {type(node).__name__}")
+
+def evaluate_numeric(expr: str) -> Optional[Union[int, float]]:
+    """Evaluar una expresión puramente numérica sin sympy; None si no se puede
+    
+    Cualquier caso dudoso (símbolos, dominio fuera de rango, complejos, división
+    por cero, desbordamiento) devuelve None para que lo resuelva sympy.
+    """
+    try:
+        value = _fast_eval_node(ast.parse(expr, mode="eval"))
+    except (SyntaxError, ValueError, TypeError, ZeroDivisionError, OverflowError, RecursionError):
+        return None
+    if isinstance(value, complex) or (isinstance(value, float) and not math.isfinite(value)):
+        return None
+    # sin(pi) da 1.2e-16 en coma flotante y 0 en sympy
+    if isinstance(value, float) and abs(value - round(value)) < 1e-12:
+        value = float(round(value))
+    return value
+
 class CalculatorTool(BaseTool):
-    """Calculadora avanzada con soporte para expresiones matemáticas complejas"""
+    """Calculadora avanzada con soporte para expresiones matemáticas complejas
+    
+    Evaluación por niveles: la aritmética pura se resuelve con la ruta rápida (AST,
+    sin sympy); el resto consulta una LRU de expresiones ya evaluadas y solo en
+    último término llama a sympy, en el pool de herramientas para no bloquear el
+    event loop con `simplify`.
+    """
+    
+    # Resultado determinista: cachear sin caducidad
+    cacheable = True
+    cache_ttl = None
     
     def __init__(self):
         super().__init__(
@@ -33,6 +122,13 @@ class CalculatorTool(BaseTool):
             'e': sp.E,
             'inf': sp.oo
         }
+        
+        # Expresiones sympy ya parseadas y simplificadas, por expresión limpia. La
+        # caché de resultados de BaseTool se consulta antes con casi la misma clave:
+        # esta solo acierta con entradas que difieren en alias (ln, arcsin...) o cuando
+        # la respuesta formateada ya salió de aquella caché
+        self.expression_cache = ToolResultCache(get_settings().calculator_expression_cache_size)
+        self.fast_path_hits = 0
     
     async def execute(self, expression: str) -> str:
         """Ejecutar cálculo matemático"""
@@ -42,8 +138,14 @@ class CalculatorTool(BaseTool):
             
             logger.info(f"🧮 Calculando: {cleaned_expr}")
             
-            # Intentar evaluar la expresión
-            result = self._evaluate_expression(cleaned_expr)
+            # Intentar evaluar la expresión: ruta rápida, caché y por último sympy
+            result = evaluate_numeric(cleaned_expr)
+            if result is not None:
+                self.fast_path_hits += 1
+            else:
+                result = self.expression_cache.get(self._expression_key(cleaned_expr))
+                if result is None:
+                    result = await get_executor("tools").run(self._evaluate_expression, cleaned_expr)
             
             # Formatear resultado
             formatted_result = self._format_result(expression, result)
@@ -59,6 +161,13 @@ class CalculatorTool(BaseTool):
                    f"  • Funciones: sqrt(16), sin(pi/2), log(10)\n" \
                    f"  • Álgebra: solve(x^2-4, x), expand((x+1)^2)"
     
+    def cache_key(self, expression: str) -> str:
+        """'2 + 2' y '2+2' son la misma expresión"""
+        return "".join(expression.split()).replace('^', '**')
+    
+    def _is_cacheable_result(self, result: str) -> bool:
+        return not result.startswith("❌")
+    
     def _clean_expression(self, expr: str) -> str:
         """Limpiar y preparar expresión matemática"""
         # Remover espacios extra
@@ -80,7 +189,17 @@ class CalculatorTool(BaseTool):
         
         return expr
     
+    @staticmethod
+    def _expression_key(expr: str) -> str:
+        return "".join(expr.split())
+    
     def _evaluate_expression(self, expr: str) -> Union[sp.Basic, float, int]:
+        """Evaluar expresión matemática con sympy y guardarla en la caché de expresiones"""
+        result = self._evaluate_sympy(expr)
+        self.expression_cache.set(self._expression_key(expr), result)
+        return result
+    
+    def _evaluate_sympy(self, expr: str) -> Union[sp.Basic, float, int]:
         """Evaluar expresión matemática"""
         try:
             # Intentar parsear con sympy
@@ -153,6 +272,14 @@ class CalculatorTool(BaseTool):
         
         return output
     
+    def get_info(self) -> Dict[str, Any]:
+        """Información de la herramienta con métricas de los niveles de evaluación"""
+        return {
+            **super().get_info(),
+            "fast_path_hits": self.fast_path_hits,
+            "expression_cache": self.expression_cache.get_stats()
+        }
+    
     def health_check(self) -> bool:
         """Verificar si la calculadora funciona correctamente"""
         try:
@@ -164,19 +291,9 @@ class CalculatorTool(BaseTool):
             logger.error(f"Health check falló para calculator: {e}")
             return False
 
-class CalculatorLangChainTool:
+class CalculatorLangChainTool(LangChainToolAdapter):
     """Adaptador para usar CalculatorTool con LangChain"""
     
-    def __init__(self):
-        self.calc_tool = CalculatorTool()
-        self.name = "Calculator"
-        self.description = self.calc_tool.description
-    
-    async def arun(self, expression: str) -> str:
-        """Método async para LangChain"""
-        return await self.calc_tool.execute(expression)
-    
-    def run(self, expression: str) -> str:
-        """Método sync para LangChain"""
-        import asyncio
-        return asyncio.run(self.calc_tool.execute(expression)) 
\ No newline at end of file
+    def __init__(self, tool: Optional[CalculatorTool] = None, manager: Optional[ToolManager] = None):
+        super().__init__(tool or CalculatorTool(), manager=manager, name="Calculator")
+        self.calc_tool = self.tool
@@ -0,0 +1,175 @@
+"""
+Resiliencia de herramientas: limitador de tasa (token bucket) y circuit breaker
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceededError(RuntimeError):
+    """No hay token disponible dentro del tiempo que se puede esperar"""
+
+class CircuitOpenError(RuntimeError):
+    """El circuito está abierto: la herramienta no se llama hasta la próxima prueba"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"'{name}' deshabilitada temporalmente por fallos repetidos, reintento en {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+class TokenBucket:
+    """Limitador de tasa: `rate` tokens por segundo con ráfagas de hasta `capacity`
+
+    Las herramientas se ejecutan desde varios event loops (el de la app y el de
+    fondo de los adaptadores), así que la contabilidad usa un lock de hilos y la
+    espera un asyncio.sleep del loop del llamante.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def _reserve(self, max_wait: Optional[float]) -> Optional[float]:
+        """Reservar un token; devuelve la espera necesaria o None si supera max_wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                self.rejected += 1
+                return None
+            # El saldo puede quedar negativo: las siguientes esperas hacen cola detrás
+            self._tokens -= 1
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+            return wait
+
+    async def acquire(self, max_wait: Optional[float] = None):
+        """Esperar a tener un token, sin pasar de max_wait segundos"""
+        wait = self._reserve(max_wait)
+        if wait is None:
+            raise RateLimitExceededError("Límite de peticiones alcanzado")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """Tomar un token solo si hay uno libre ahora mismo, sin esperar"""
+        return self._reserve(0.0) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(max(0.0, self._tokens), 2),
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "rejected": self.rejected
+        }
+
+class CircuitBreaker:
+    """Circuit breaker con estados closed, open y half_open
+
+    - closed: las llamadas pasan; `failure_threshold` fallos seguidos lo abren.
+    - open: las llamadas se rechazan sin llegar a la herramienta durante
+      `recovery_timeout` segundos.
+    - half_open: pasado ese tiempo se deja pasar una llamada de prueba; si va bien
+      se cierra, si falla vuelve a abrirse.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"[CIRCUIT] '{self.name}' half_open: se permite una llamada de prueba")
+        return self._state
+
+    def retry_in(self) -> float:
+        """Segundos hasta la próxima llamada de prueba"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        """Decidir si una llamada puede pasar (en half_open, solo la de prueba)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"[CIRCUIT] '{self.name}' closed: la herramienta se ha recuperado")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(f"tras {self._failures} fallo(s)")
+
+    def release(self):
+        """Llamada sin veredicto (p. ej. cortada por el límite de la consulta)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self, reason: str):
+        if self._state != self.OPEN:
+            self.times_opened += 1
+            logger.warning(
+                f"[CIRCUIT] '{self.name}' open {reason}: próxima prueba en {self.recovery_timeout:g}s"
+            )
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_in": round(self.retry_in(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
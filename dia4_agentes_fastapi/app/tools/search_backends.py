@@ -0,0 +1,400 @@
+"""
+Backends de búsqueda web intercambiables para WebSearchTool
+"""
+
+import queue
+import random
+import asyncio
+import threading
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    from ddgs import DDGS
+except ImportError:
+    try:
+        from duckduckgo_search import DDGS
+    except ImportError:
+        DDGS = None
+
+from .resilience import RateLimitExceededError, TokenBucket
+from ..config import get_settings
+from ..executors import get_executor
+
+logger = logging.getLogger(__name__)
+
+InflightKey = Tuple[str, int, str]
+
+class SearchBackend(ABC):
+    """Interfaz de un backend de búsqueda: resultados como dicts con title, body y href
+
+    asearch() aplica coalescencia (single-flight) a todos los backends: búsquedas
+    simultáneas con la misma consulta comparten una sola llamada al proveedor. La
+    llamada compartida usa el timeout del backend y cada consulta espera solo lo
+    que le permite su propio presupuesto. Las peticiones en curso son por event
+    loop (el de la app y el loop de fondo de los adaptadores).
+    """
+
+    name = "base"
+    # Límite de la llamada compartida; None = sin límite propio
+    timeout: Optional[float] = None
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.coalesced = 0
+        # Limitador opcional de las peticiones que salen al proveedor
+        self.rate_limiter: Optional[TokenBucket] = None
+        self._inflight: Dict[asyncio.AbstractEventLoop, Dict[InflightKey, "asyncio.Future[Any]"]] = {}
+
+    @abstractmethod
+    def search(self, query: str, max_results: int, region: str,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Búsqueda síncrona (bloqueante)"""
+
+    async def asearch(self, query: str, max_results: int, region: str,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Búsqueda async compartida con las simultáneas de la misma consulta"""
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        key = (" ".join(query.split()), max_results, region)
+
+        future = inflight.get(key)
+        if future is None:
+            future = inflight[key] = asyncio.ensure_future(self._asearch_upstream(query, max_results, region))
+            future.add_done_callback(lambda f: self._finish(inflight, key, f))
+        else:
+            self.coalesced += 1
+            logger.info(f"[SEARCH] Compartiendo búsqueda en curso: '{key[0]}'")
+        # shield: si una consulta se cancela o agota su plazo, las demás siguen esperando
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _asearch_upstream(self, query: str, max_results: int, region: str) -> List[Dict[str, Any]]:
+        """Llamada al proveedor: por defecto, la búsqueda síncrona en el pool de herramientas"""
+        # Solo las peticiones que salen consumen turno: las compartidas no
+        await self._throttle(self.timeout)
+        return await get_executor("tools").run(self.search, query, max_results, region, self.timeout)
+
+    @staticmethod
+    def _finish(inflight: Dict[InflightKey, "asyncio.Future[Any]"], key: InflightKey,
+                future: "asyncio.Future[Any]"):
+        if inflight.get(key) is future:
+            del inflight[key]
+        # Marcar el error como recuperado aunque todas las consultas se hayan cancelado
+        if not future.cancelled():
+            future.exception()
+
+    async def _throttle(self, timeout: Optional[float]):
+        """Esperar turno en el limitador, sin pasar de timeout"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(timeout)
+
+    def health_check(self) -> bool:
+        """Verificar con una búsqueda mínima, que también gasta un token del limitador
+
+        Sin token libre no se espera ni se prueba: RateLimitExceededError indica que
+        no hay veredicto.
+        """
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            raise RateLimitExceededError("Health check omitido: límite de peticiones alcanzado")
+        return len(self.search("test", 1, "wt-wt")) > 0
+
+    def close(self):
+        """Liberar conexiones"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "inflight": sum(len(calls) for calls in self._inflight.values()),
+            "rate_limit": self.rate_limiter.get_stats() if self.rate_limiter else None
+        }
+
+class MockSearchBackend(SearchBackend):
+    """Resultados simulados cuando no hay biblioteca de búsqueda"""
+
+    name = "mock"
+
+    def search(self, query: str, max_results: int, region: str,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        self.requests += 1
+        return [{
+            'title': f"[MOCK] Resultado para: {query}",
+            'body': "Biblioteca de búsqueda web no disponible. Instala 'ddgs' para funcionalidad completa.",
+            'href': "https://example.com"
+        }]
+
+class DDGSSearchBackend(SearchBackend):
+    """DuckDuckGo con un pool de sesiones DDGS reutilizables
+
+    Cada sesión mantiene su cliente HTTP (keep-alive y TLS ya negociado) entre
+    búsquedas. El tamaño del pool limita las búsquedas simultáneas; una sesión que
+    falla se descarta y se sustituye por una nueva.
+    """
+
+    name = "ddgs"
+
+    def __init__(self, pool_size: int, timeout: float):
+        super().__init__()
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._sessions: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.sessions_recycled = 0
+
+    def _acquire(self, wait: Optional[float]) -> Any:
+        """Tomar una sesión libre, creando una si el pool no está completo"""
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return DDGS(timeout=max(1, int(self.timeout)))
+        try:
+            return self._sessions.get(timeout=wait)
+        except queue.Empty:
+            raise TimeoutError("No hay sesiones DDGS libres")
+
+    def _discard(self, session: Any):
+        """Cerrar una sesión fallida (su cliente HTTP) y liberar su hueco en el pool"""
+        try:
+            session.__exit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"[SEARCH] Error cerrando sesión DDGS descartada: {e}")
+        with self._lock:
+            self._created -= 1
+            self.sessions_recycled += 1
+
+    def search(self, query: str, max_results: int, region: str,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        self.requests += 1
+        session = self._acquire(timeout if timeout is not None else self.timeout)
+        try:
+            results = list(session.text(
+                keywords=query,
+                region=region,
+                max_results=max_results,
+                safesearch='moderate'
+            ))
+        except Exception:
+            self.errors += 1
+            self._discard(session)
+            raise
+        self._sessions.put(session)
+        return results
+
+    def close(self):
+        while True:
+            try:
+                session = self._sessions.get_nowait()
+            except queue.Empty:
+                break
+            session.__exit__(None, None, None)
+        with self._lock:
+            self._created = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "pool_size": self.pool_size,
+            "sessions_open": self._created,
+            "sessions_idle": self._sessions.qsize(),
+            "sessions_recycled": self.sessions_recycled
+        }
+
+class HTTPSearchBackend(SearchBackend):
+    """Servicio de búsqueda HTTP con API JSON (GET /search?q=&max_results=&region=)
+
+    Pensado para un servicio propio o un stand-in local en pruebas y benchmarks.
+    Un único httpx.Client reutiliza las conexiones (keep-alive) y limita cuántas
+    hay abiertas a la vez.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str, pool_size: int, timeout: float):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    def search(self, query: str, max_results: int, region: str,
+               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        self.requests += 1
+        try:
+            response = self._client.get(
+                "/search",
+                params={"q": query, "max_results": max_results, "region": region},
+                timeout=min(timeout, self.timeout) if timeout is not None else self.timeout
+            )
+            response.raise_for_status()
+            return response.json().get("results", [])
+        except Exception:
+            self.errors += 1
+            raise
+
+    def close(self):
+        self._client.close()
+
+class AsyncHTTPSearchBackend(HTTPSearchBackend):
+    """Backend HTTP nativo async con hedging y reintentos sobre la coalescencia común
+
+    - Hedging: si la petición no responde en hedge_delay segundos se lanza una
+      segunda y gana la primera que termine bien.
+    - Reintentos: errores de red, 429 y 5xx se reintentan con backoff exponencial
+      con jitter, sin pasar del timeout de la búsqueda.
+
+    Los clientes httpx.AsyncClient son por event loop (el de la app y el loop de
+    fondo de los adaptadores). search() síncrono sigue
+    usando el cliente del backend HTTP.
+    """
+
+    name = "async_http"
+
+    def __init__(self, base_url: str, pool_size: int, timeout: float,
+                 hedge_delay: float = 0.0, max_retries: int = 0, retry_backoff: float = 0.2):
+        super().__init__(base_url, pool_size, timeout)
+        self.pool_size = pool_size
+        self.hedge_delay = hedge_delay
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self.upstream_requests = 0
+        self.hedged = 0
+        self.retries = 0
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        return client
+
+    async def _asearch_upstream(self, query: str, max_results: int, region: str) -> List[Dict[str, Any]]:
+        """Petición con reintentos y hedging dentro del timeout del backend"""
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        params = {"q": query, "max_results": max_results, "region": region}
+
+        attempt = 0
+        while True:
+            try:
+                # Solo las peticiones que salen consumen turno: las compartidas no
+                await self._throttle(deadline - loop.time())
+                return await self._hedged_request(params, deadline - loop.time())
+            except (httpx.TransportError, httpx.HTTPStatusError, asyncio.TimeoutError) as e:
+                self.errors += 1
+                if not self._is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                # Backoff exponencial con jitter completo para no sincronizar reintentos
+                delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+                if loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"[SEARCH] Reintento {attempt}/{self.max_retries} en {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return True
+
+    async def _hedged_request(self, params: Dict[str, Any], budget: float) -> List[Dict[str, Any]]:
+        """Primera respuesta correcta entre la petición original y la de respaldo"""
+        if budget <= 0:
+            raise asyncio.TimeoutError("Presupuesto de búsqueda agotado")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        tasks = [asyncio.ensure_future(self._request(params, budget))]
+        try:
+            if 0 < self.hedge_delay < budget:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+                if not done:
+                    self.hedged += 1
+                    tasks.append(asyncio.ensure_future(self._request(params, deadline - loop.time())))
+
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _request(self, params: Dict[str, Any], budget: float) -> List[Dict[str, Any]]:
+        self.upstream_requests += 1
+        # El timeout de httpx es por operación: wait_for acota la petición completa
+        response = await asyncio.wait_for(self._async_client().get("/search", params=params), budget)
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+    def close(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, client in self._clients.items():
+            if loop is running:
+                loop.create_task(client.aclose())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        self._clients.clear()
+        super().close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "upstream_requests": self.upstream_requests,
+            "coalesced": self.coalesced,
+            "hedged": self.hedged,
+            "retries": self.retries
+        }
+
+def create_search_backend() -> SearchBackend:
+    """Crear el backend indicado en la configuración (web_search_backend)"""
+    settings = get_settings()
+    backend = settings.web_search_backend
+    if backend == "http":
+        return HTTPSearchBackend(
+            settings.web_search_http_url,
+            settings.web_search_pool_size,
+            settings.web_search_timeout
+        )
+    if backend == "async_http":
+        return AsyncHTTPSearchBackend(
+            settings.web_search_http_url,
+            settings.web_search_pool_size,
+            settings.web_search_timeout,
+            hedge_delay=settings.web_search_hedge_delay,
+            max_retries=settings.web_search_max_retries,
+            retry_backoff=settings.web_search_retry_backoff
+        )
+    if backend == "mock":
+        return MockSearchBackend()
+    if DDGS is None:
+        logger.warning("DDGS no disponible, usando backend de búsqueda mock")
+        return MockSearchBackend()
+    return DDGSSearchBackend(settings.web_search_pool_size, settings.web_search_timeout)
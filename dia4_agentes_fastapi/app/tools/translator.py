@@ -6,7 +6,8 @@ Herramienta de traducción usando implementación mock para desarrollo
 import asyncio
 import logging
 from typing import Optional, Dict, List
-from .base import BaseTool
+from .base import BaseTool, ToolManager
+from .adapters import LangChainToolAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,10 @@ class MockTranslationResult:
 class TranslatorTool(BaseTool):
     """Herramienta de traducción usando implementación mock para desarrollo"""
     
+    # Resultado determinista: cachear sin caducidad
+    cacheable = True
+    cache_ttl = None
+    
     def __init__(self):
         super().__init__(
             name="translator",
@@ -81,6 +86,15 @@ class TranslatorTool(BaseTool):
             logger.error(f"Error en traducción mock: {e}")
             return f"Error en traducción: {str(e)}"
     
+    def cache_key(self, text_input: str) -> str:
+        """Misma clave para 'Hello | ES' y 'Hello|es'"""
+        text, _, target = text_input.partition('|')
+        key = " ".join(text.split())
+        return f"{key}|{target.strip().lower()}" if target.strip() else key
+    
+    def _is_cacheable_result(self, result: str) -> bool:
+        return not result.startswith("Error")
+    
     def _parse_input(self, text_input: str) -> tuple[str, str, Optional[str]]:
         """Parsear entrada del usuario"""
         # Formato: "texto | idioma_destino"
@@ -169,18 +183,9 @@ En producción se usaría Google Translate u otro servicio real."""
         """Obtener idiomas comunes"""
         return self.common_languages.copy()
 
-class TranslatorLangChainTool:
+class TranslatorLangChainTool(LangChainToolAdapter):
     """Adaptador de LangChain para el traductor mock"""
     
-    def __init__(self):
-        self.translator_tool = TranslatorTool()
-        self.name = "translator"
-        self.description = self.translator_tool.description
-    
-    async def arun(self, text_input: str) -> str:
-        """Ejecutar traducción de forma asíncrona"""
-        return await self.translator_tool.execute(text_input)
-    
-    def run(self, text_input: str) -> str:
-        """Ejecutar traducción de forma síncrona"""
-        return asyncio.run(self.translator_tool.execute(text_input)) 
\ No newline at end of file
+    def __init__(self, tool: Optional[TranslatorTool] = None, manager: Optional[ToolManager] = None):
+        super().__init__(tool or TranslatorTool(), manager=manager, name="translator")
+        self.translator_tool = self.tool
@@ -4,22 +4,26 @@ Herramienta de búsqueda web real usando DuckDuckGo
 
 import asyncio
 import logging
-from typing import Optional
-try:
-    from ddgs import DDGS
-except ImportError:
-    try:
-        from duckduckgo_search import DDGS
-    except ImportError:
-        DDGS = None
-from .base import BaseTool
+from typing import Any, Dict, Optional, Set
+from .base import BaseTool, ToolManager, deadline_scope, remaining_budget
+from .adapters import LangChainToolAdapter
+from .cache import StaleWhileRevalidateCache
+from .resilience import RateLimitExceededError, TokenBucket
+from .search_backends import SearchBackend, create_search_backend
+from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 
 class WebSearchTool(BaseTool):
-    """Herramienta de búsqueda web usando DuckDuckGo"""
+    """Herramienta de búsqueda web usando DuckDuckGo
     
-    def __init__(self):
+    Usa su propia caché stale-while-revalidate en lugar de la caché LRU de
+    BaseTool: pasado el TTL blando se sirve el resultado guardado y se refresca en
+    segundo plano; solo tras el TTL duro la llamada espera al proveedor.
+    """
+    
+    def __init__(self, backend: Optional[SearchBackend] = None):
+        settings = get_settings()
         super().__init__(
             name="web_search",
             description="Buscar información actualizada en internet usando DuckDuckGo. "
@@ -27,53 +31,87 @@ class WebSearchTool(BaseTool):
         )
         self.max_results = 5
         self.region = "es-es"  # Región en español
+        # Backend intercambiable (DDGS con sesiones reutilizables, HTTP o mock)
+        self.backend = backend or create_search_backend()
+        # No saturar al proveedor: limitar las búsquedas que salen (caché y coalescencia no cuentan)
+        if self.backend.rate_limiter is None:
+            self.backend.rate_limiter = TokenBucket(settings.web_search_rate_limit, settings.web_search_rate_burst)
+        self.results_cache = StaleWhileRevalidateCache(
+            settings.tool_cache_max_entries,
+            soft_ttl=settings.web_search_cache_ttl,
+            hard_ttl=settings.web_search_cache_hard_ttl
+        )
+        self.refresh_timeout = settings.tool_timeouts.get(self.name, settings.tool_timeout)
+        self._refresh_tasks: Set["asyncio.Task[None]"] = set()
         
     async def execute(self, query: str) -> str:
-        """Ejecutar búsqueda web"""
-        try:
-            # DuckDuckGo search no es nativa async, usar thread pool
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
-                None, 
-                self._search_sync, 
-                query
-            )
-            
-            if not results:
-                return f"No se encontraron resultados para: {query}"
-            
-            # Formatear resultados
-            formatted_results = self._format_results(results, query)
-            
-            logger.info(f"🌐 Búsqueda web completada: {len(results)} resultados para '{query}'")
-            return formatted_results
-            
-        except Exception as e:
-            logger.error(f"Error en búsqueda web: {e}")
-            return f"Error realizando búsqueda: {str(e)}"
-    
-    def _search_sync(self, query: str) -> list:
-        """Búsqueda síncrona usando DuckDuckGo"""
-        if DDGS is None:
-            logger.warning("DDGS no disponible, retornando resultados mock")
-            return [{
-                'title': f"[MOCK] Resultado para: {query}",
-                'body': "Biblioteca de búsqueda web no disponible. Instala 'ddgs' para funcionalidad completa.",
-                'href': "https://example.com"
-            }]
+        """Ejecutar búsqueda web
+        
+        Los errores del proveedor (p. ej. límite de peticiones) se propagan para que
+        BaseTool.run los cuente en el circuit breaker.
+        """
+        # El backend limita la petición (y la espera del limitador) al presupuesto restante
+        results = await self.backend.asearch(query, self.max_results, self.region, remaining_budget())
+        
+        if not results:
+            return f"No se encontraron resultados para: {query}"
         
+        # Formatear resultados
+        formatted_results = self._format_results(results, query)
+        
+        logger.info(f"🌐 Búsqueda web completada: {len(results)} resultados para '{query}'")
+        return formatted_results
+    
+    def cache_key(self, query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    def _is_cacheable_result(self, result: str) -> bool:
+        return not result.startswith(("Error", "No se encontraron"))
+    
+    def _get_cached(self, query: str) -> Optional[str]:
+        """Servir fresco u obsoleto (refrescando en segundo plano) hasta el TTL duro"""
+        key = self.cache_key(query)
+        item = self.results_cache.get_with_age(key)
+        if item is None:
+            return None
+        result, age = item
+        if self.results_cache.is_stale(age) and self.results_cache.begin_refresh(key):
+            logger.info(f"[CACHE] Resultado de '{key}' obsoleto ({age:.0f}s): refrescando en segundo plano")
+            task = asyncio.get_running_loop().create_task(self._refresh(key, query))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return result
+    
+    def _set_cached(self, query: str, result: str):
+        if self._is_cacheable_result(result):
+            self.results_cache.set(self.cache_key(query), result)
+    
+    async def _refresh(self, key: str, query: str):
+        """Repetir la búsqueda fuera de la consulta y actualizar la caché"""
+        ok = False
         try:
-            with DDGS() as ddgs:
-                results = list(ddgs.text(
-                    keywords=query,
-                    region=self.region,
-                    max_results=self.max_results,
-                    safesearch='moderate'
-                ))
-                return results
+            # Con el circuito abierto se sigue sirviendo el resultado obsoleto
+            if not self.breaker.allow_request():
+                return
+            try:
+                # Plazo propio: la consulta que lanzó el refresco ya puede haber terminado
+                with deadline_scope(self.refresh_timeout, detached=True):
+                    result = await asyncio.wait_for(self.execute(query), self.refresh_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self.breaker.release()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            self._set_cached(query, result)
+            ok = True
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Error en _search_sync: {e}")
-            return []
+            logger.warning(f"[CACHE] Error refrescando '{key}': {e}")
+        finally:
+            self.results_cache.end_refresh(key, ok)
     
     def _format_results(self, results: list, query: str) -> str:
         """Formatear resultados de búsqueda"""
@@ -96,36 +134,33 @@ class WebSearchTool(BaseTool):
         return formatted
     
     def health_check(self) -> bool:
-        """Verificar si DuckDuckGo está disponible"""
-        if DDGS is None:
-            logger.warning("DDGS no disponible, usando modo mock")
-            return True  # Mock siempre disponible
-        
+        """Verificar si el backend de búsqueda está disponible"""
         try:
-            # Test rápido con búsqueda simple
-            with DDGS() as ddgs:
-                test_results = list(ddgs.text(
-                    keywords="test",
-                    max_results=1,
-                    safesearch='moderate'
-                ))
-                return len(test_results) > 0
+            # Test rápido con búsqueda simple, reutilizando las conexiones del backend
+            return self.backend.health_check()
+        except RateLimitExceededError:
+            raise
         except Exception as e:
             logger.error(f"Health check falló para web_search: {e}")
             return False
-
-class WebSearchLangChainTool:
-    """Adaptador para usar WebSearchTool con LangChain"""
     
-    def __init__(self):
-        self.web_tool = WebSearchTool()
-        self.name = "DuckDuckGo_Search"
-        self.description = self.web_tool.description
+    def get_info(self) -> Dict[str, Any]:
+        """Información de la herramienta con métricas del backend"""
+        return {
+            **super().get_info(),
+            "cache": self.results_cache.get_stats(),
+            "backend": self.backend.get_stats()
+        }
     
-    async def arun(self, query: str) -> str:
-        """Método async para LangChain"""
-        return await self.web_tool.execute(query)
+    def close(self):
+        """Cancelar refrescos pendientes y cerrar las conexiones del backend"""
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        self.backend.close()
+
+class WebSearchLangChainTool(LangChainToolAdapter):
+    """Adaptador para usar WebSearchTool con LangChain"""
     
-    def run(self, query: str) -> str:
-        """Método sync para LangChain"""
-        return asyncio.run(self.web_tool.execute(query)) 
\ No newline at end of file
+    def __init__(self, tool: Optional[WebSearchTool] = None, manager: Optional[ToolManager] = None):
+        super().__init__(tool or WebSearchTool(), manager=manager, name="DuckDuckGo_Search")
+        self.web_tool = self.tool
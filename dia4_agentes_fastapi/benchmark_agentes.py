@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark de concurrencia del agente ReAct
+
+Compara dos formas de ejecutar el mismo agente (LLM simulado + Calculator):
+- antes: AgentExecutor.invoke en un hilo del executor por defecto; cada herramienta
+  cae en func=tool.run, la entrada síncrona del adaptador.
+- ahora: AgentExecutor.ainvoke en el event loop de la app; las herramientas usan
+  coroutine=arun y comparten ese loop.
+
+El LLM del benchmark espera --latencia-ms por llamada (asyncio.sleep en async,
+time.sleep en sync) y pide una llamada a Calculator antes de responder, de modo
+que cada consulta hace dos llamadas al LLM y una a la herramienta.
+
+Ejecutar:
+  python benchmark_agentes.py --concurrencias 1 10 50 200 --latencia-ms 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from typing import Any, List, Mapping, Optional
+
+from langchain_core.language_models.llms import BaseLLM
+from langchain_core.outputs import Generation, LLMResult
+
+from app.agent_service import AgentService
+
+class LLMSimulado(BaseLLM):
+    """LLM con latencia fija que usa Calculator una vez y luego responde"""
+
+    latencia_s: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark"
+
+    @property
+    def _identifying_params(self) -> Mapping[str, Any]:
+        return {"latencia_s": self.latencia_s}
+
+    def _responder(self, prompt: str) -> str:
+        # Solo mirar el scratchpad de la pregunta actual, no el formato del prompt
+        scratchpad = prompt.rsplit("Question:", 1)[-1]
+        if "Observation:" not in scratchpad:
+            return "Thought: Necesito calcular.\nAction: Calculator\nAction Input: 2 + 2"
+        return "Thought: I now know the final answer\nFinal Answer: 4"
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        time.sleep(self.latencia_s)
+        return LLMResult(generations=[[Generation(text=self._responder(p))] for p in prompts])
+
+    async def _agenerate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> LLMResult:
+        await asyncio.sleep(self.latencia_s)
+        return LLMResult(generations=[[Generation(text=self._responder(p))] for p in prompts])
+
+async def crear_servicio(latencia_s: float) -> AgentService:
+    """AgentService real con el LLM simulado en lugar del modelo configurado"""
+    servicio = AgentService()
+    await servicio._setup_tools()
+    servicio.llm = LLMSimulado(latencia_s=latencia_s)
+    await servicio._setup_agent()
+    servicio.agent_executor.verbose = False
+    return servicio
+
+async def medir(servicio: AgentService, modo: str, concurrencia: int) -> dict:
+    """Lanza N consultas concurrentes y mide throughput, latencias e hilos"""
+    loop = asyncio.get_running_loop()
+    entrada = {"input": "Cuanto es 2 + 2?"}
+    hilos_max = threading.active_count()
+    midiendo = True
+
+    async def muestrear_hilos():
+        nonlocal hilos_max
+        while midiendo:
+            hilos_max = max(hilos_max, threading.active_count())
+            await asyncio.sleep(0.005)
+
+    async def consulta() -> float:
+        t0 = time.perf_counter()
+        if modo == "antes":
+            resultado = await loop.run_in_executor(None, servicio.agent_executor.invoke, entrada)
+        else:
+            resultado = await servicio.agent_executor.ainvoke(entrada)
+        assert resultado["intermediate_steps"], "el agente no llamó a la herramienta"
+        return (time.perf_counter() - t0) * 1000
+
+    muestreo = asyncio.create_task(muestrear_hilos())
+    inicio = time.perf_counter()
+    latencias = await asyncio.gather(*(consulta() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+    midiendo = False
+    await muestreo
+
+    latencias = sorted(latencias)
+    return {
+        "q_s": concurrencia / duracion,
+        "p50_ms": statistics.median(latencias),
+        "p95_ms": latencias[max(int(len(latencias) * 0.95) - 1, 0)],
+        "hilos_max": hilos_max,
+    }
+
+async def main(args):
+    servicio = await crear_servicio(args.latencia_ms / 1000)
+
+    print(f"\n📊 Agente con LLM simulado ({args.latencia_ms:g} ms por llamada, 2 llamadas + Calculator)\n")
+    print(f"{'modo':<8}{'concurrencia':>14}{'q/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'hilos máx':>11}")
+    print("-" * 63)
+    for concurrencia in args.concurrencias:
+        for modo in ("antes", "ahora"):
+            r = await medir(servicio, modo, concurrencia)
+            print(f"{modo:<8}{concurrencia:>14}{r['q_s']:>10.1f}{r['p50_ms']:>10.0f}"
+                  f"{r['p95_ms']:>10.0f}{r['hilos_max']:>11}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de concurrencia del agente")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--latencia-ms", type=float, default=200)
+    asyncio.run(main(parser.parse_args()))
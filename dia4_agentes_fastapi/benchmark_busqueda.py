@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark de carga de la búsqueda web
+
+Lanza N búsquedas concurrentes repartidas entre unas pocas consultas distintas
+(varios agentes preguntando lo mismo a la vez) contra fake_search_server.py y
+compara dos backends de WebSearchTool, ambos con coalescencia (una petición por
+consulta en curso):
+- http: cliente síncrono en el pool de herramientas.
+- async_http: cliente async con hedging y reintentos con backoff.
+
+Se mide cuántas peticiones llegan al servicio, throughput y latencias. Con
+--lentas y --errores el servidor simula cola de latencia y fallos 503. Los fallos
+de http con mucha concurrencia son búsquedas rechazadas por la cola llena del pool
+de herramientas (en la API, un 503).
+
+Ejecutar:
+  python benchmark_busqueda.py --concurrencias 10 50 200 --distintas 5 --latencia-ms 100
+  python benchmark_busqueda.py --lentas 0.1 --errores 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.tools.search_backends import AsyncHTTPSearchBackend, HTTPSearchBackend, SearchBackend
+from fake_search_server import FakeSearchServer
+
+async def medir(backend: SearchBackend, servidor: FakeSearchServer,
+                concurrencia: int, distintas: int) -> dict:
+    """N búsquedas concurrentes sobre `distintas` consultas"""
+    servidor.reset()
+    fallos = 0
+
+    async def buscar(i: int) -> float:
+        nonlocal fallos
+        t0 = time.perf_counter()
+        try:
+            await backend.asearch(f"consulta {i % distintas}", 5, "es-es", 10.0)
+        except Exception:
+            fallos += 1
+        return (time.perf_counter() - t0) * 1000
+
+    inicio = time.perf_counter()
+    latencias = sorted(await asyncio.gather(*(buscar(i) for i in range(concurrencia))))
+    duracion = time.perf_counter() - inicio
+    return {
+        "upstream": servidor.requests,
+        "q_s": concurrencia / duracion,
+        "p50_ms": statistics.median(latencias),
+        "p95_ms": latencias[max(int(len(latencias) * 0.95) - 1, 0)],
+        "fallos": fallos,
+    }
+
+async def main(args):
+    with FakeSearchServer(latencia_ms=args.latencia_ms, lentas=args.lentas,
+                          latencia_lenta_ms=args.latencia_lenta_ms, errores=args.errores,
+                          semilla=42) as servidor:
+        backends = {
+            "http": HTTPSearchBackend(servidor.url, args.pool, 10.0),
+            "async_http": AsyncHTTPSearchBackend(
+                servidor.url, args.pool, 10.0,
+                hedge_delay=args.hedge_ms / 1000, max_retries=args.reintentos, retry_backoff=0.05
+            ),
+        }
+
+        print(f"\n📊 Búsqueda web ({args.latencia_ms:g} ms por petición, {args.distintas} consultas distintas, "
+              f"{args.lentas:.0%} lentas, {args.errores:.0%} errores)\n")
+        print(f"{'backend':<12}{'concurrencia':>14}{'upstream':>10}{'q/s':>10}{'p50 ms':>10}"
+              f"{'p95 ms':>10}{'fallos':>8}")
+        print("-" * 74)
+        # Calentar: abrir la primera conexión de cada backend fuera de la medida
+        for backend in backends.values():
+            await backend.asearch("calentamiento", 5, "es-es", 10.0)
+
+        for concurrencia in args.concurrencias:
+            for nombre, backend in backends.items():
+                r = await medir(backend, servidor, concurrencia, args.distintas)
+                print(f"{nombre:<12}{concurrencia:>14}{r['upstream']:>10}{r['q_s']:>10.1f}"
+                      f"{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['fallos']:>8}")
+
+        for nombre, backend in backends.items():
+            print(f"\n{nombre}: {backend.get_stats()}")
+        for backend in backends.values():
+            backend.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la búsqueda web")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--distintas", type=int, default=5, help="consultas distintas entre las N búsquedas")
+    parser.add_argument("--latencia-ms", type=float, default=100)
+    parser.add_argument("--lentas", type=float, default=0.0)
+    parser.add_argument("--latencia-lenta-ms", type=float, default=1000)
+    parser.add_argument("--errores", type=float, default=0.0)
+    parser.add_argument("--pool", type=int, default=16, help="conexiones por backend")
+    parser.add_argument("--hedge-ms", type=float, default=300)
+    parser.add_argument("--reintentos", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
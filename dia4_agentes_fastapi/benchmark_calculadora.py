@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+📊 Benchmark de la calculadora por tipo de expresión
+
+Compara tres formas de evaluar las mismas expresiones de CalculatorTool:
+- antes: sympify + simplify en cada llamada (el evaluador original).
+- frío: evaluación por niveles con la caché de expresiones vacía (ruta rápida
+  para aritmética y trigonometría numérica, sympy para el resto).
+- caliente: evaluación por niveles con la caché de expresiones ya poblada.
+
+Se mide `execute()` directamente (antes: limpiar, evaluar y formatear, en el
+mismo hilo), sin la caché de resultados de BaseTool, para ver el coste del
+evaluador y no el de la caché de respuestas formateadas. En la API esa caché se
+consulta antes y con casi la misma clave, así que el modo caliente es el caso de
+una respuesta ya expulsada de ella. El modo frío incluye el salto al pool de
+herramientas de las expresiones que necesitan sympy.
+
+Ejecutar:
+  python benchmark_calculadora.py --repeticiones 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from app.tools.calculator import CalculatorTool
+
+EXPRESIONES: Dict[str, List[str]] = {
+    "aritmética": ["2+2", "3*4 - 7/2", "(15 + 27) * 3 / 7", "2**32 % 1000", "10//3 + 0.5"],
+    "trigonometría": ["sin(pi/2)", "cos(pi/3) + sin(pi/6)", "tan(pi/4)", "atan(1)*4", "sqrt(2)*log(10)"],
+    "álgebra": ["expand((x+1)^3)", "factor(x^2 - 5*x + 6)", "(x^2 - 1)/(x - 1)", "simplify(sin(x)^2 + cos(x)^2)"],
+    "cálculo": ["diff(x^3 + 2*x, x)", "integrate(x^2, x)", "limit(sin(x)/x, x, 0)", "integrate(exp(-x), (x, 0, inf))"],
+}
+
+async def medir(herramienta: CalculatorTool, expresiones: List[str], repeticiones: int, modo: str) -> float:
+    """Milisegundos por evaluación (mediana de las repeticiones)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        for expresion in expresiones:
+            if modo == "frío":
+                herramienta.expression_cache.clear()
+            t0 = time.perf_counter()
+            if modo == "antes":
+                resultado = herramienta._evaluate_sympy(herramienta._clean_expression(expresion))
+                herramienta._format_result(expresion, resultado)
+            else:
+                await herramienta.execute(expresion)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+async def main(args):
+    herramienta = CalculatorTool()
+    # Calentar sympy (imports perezosos, cachés internas) fuera de la medida
+    for expresiones in EXPRESIONES.values():
+        for expresion in expresiones:
+            herramienta._evaluate_sympy(herramienta._clean_expression(expresion))
+
+    print(f"\n📊 CalculatorTool: mediana en ms por expresión ({args.repeticiones} repeticiones)\n")
+    print(f"{'tipo':<16}{'antes':>10}{'frío':>10}{'caliente':>10}{'mejora':>10}")
+    print("-" * 56)
+    for tipo, expresiones in EXPRESIONES.items():
+        antes = await medir(herramienta, expresiones, args.repeticiones, "antes")
+        frio = await medir(herramienta, expresiones, args.repeticiones, "frío")
+        caliente = await medir(herramienta, expresiones, args.repeticiones, "caliente")
+        print(f"{tipo:<16}{antes:>10.3f}{frio:>10.3f}{caliente:>10.3f}{antes / caliente:>9.0f}x")
+
+    print(f"\nRuta rápida: {herramienta.fast_path_hits} evaluaciones")
+    print(f"Caché de expresiones: {herramienta.expression_cache.get_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la calculadora")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+🔎 Servidor de búsqueda simulado para pruebas y benchmarks
+
+Implementa la API que esperan los backends http y async_http de WebSearchTool:
+
+  GET  /search?q=&max_results=&region=  -> {"results": [{"title", "body", "href"}]}
+  GET  /stats                           -> {"requests": N}
+  POST /reset                           -> pone el contador a cero
+
+Cada búsqueda espera --latencia-ms; una fracción --lentas tarda --latencia-lenta-ms
+(cola de latencia, para ver el efecto del hedging) y una fracción --errores
+responde 503 (para ver los reintentos).
+
+Ejecutar:
+  python fake_search_server.py --puerto 8765 --latencia-ms 100
+  WEB_SEARCH_BACKEND=async_http WEB_SEARCH_HTTP_URL=http://127.0.0.1:8765 uvicorn app.main:app
+
+Desde código (p. ej. en un benchmark):
+  with FakeSearchServer(latencia_ms=100) as servidor:
+      ... servidor.url, servidor.requests ...
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    # Muchas conexiones simultáneas en los benchmarks de carga
+    request_queue_size = 512
+
+    def handle_error(self, request, client_address):
+        # Clientes que cancelan (hedging, timeouts) cierran la conexión a mitad de respuesta
+        pass
+
+class FakeSearchServer:
+    """Servidor HTTP en un hilo con latencia y errores configurables"""
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 0, latencia_ms: float = 100,
+                 lentas: float = 0.0, latencia_lenta_ms: float = 1000, errores: float = 0.0,
+                 semilla: Optional[int] = None):
+        self.latencia_s = latencia_ms / 1000
+        self.lentas = lentas
+        self.latencia_lenta_s = latencia_lenta_ms / 1000
+        self.errores = errores
+        self.requests = 0
+        self._random = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._httpd = _Servidor((host, puerto), self._crear_handler())
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+
+    def _sortear(self) -> str:
+        """Decidir si la petición es normal, lenta o fallida"""
+        with self._lock:
+            self.requests += 1
+            valor = self._random.random()
+        if valor < self.errores:
+            return "error"
+        if valor < self.errores + self.lentas:
+            return "lenta"
+        return "normal"
+
+    def _crear_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def _responder(self, estado: int, cuerpo: dict):
+                datos = json.dumps(cuerpo).encode()
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/stats":
+                    return self._responder(200, {"requests": servidor.requests})
+                if url.path != "/search":
+                    return self._responder(404, {"error": "not found"})
+
+                params = parse_qs(url.query)
+                consulta = params.get("q", [""])[0]
+                max_results = int(params.get("max_results", ["5"])[0])
+
+                tipo = servidor._sortear()
+                time.sleep(servidor.latencia_lenta_s if tipo == "lenta" else servidor.latencia_s)
+                if tipo == "error":
+                    return self._responder(503, {"error": "servicio no disponible"})
+                self._responder(200, {"results": [
+                    {
+                        "title": f"Resultado {i + 1} para: {consulta}",
+                        "body": f"Contenido simulado sobre '{consulta}'.",
+                        "href": f"https://example.com/{i + 1}"
+                    }
+                    for i in range(max_results)
+                ]})
+
+            def do_POST(self):
+                if urlparse(self.path).path == "/reset":
+                    servidor.reset()
+                    return self._responder(200, {"requests": 0})
+                self._responder(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeSearchServer":
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeSearchServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de búsqueda simulado")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=float, default=100)
+    parser.add_argument("--lentas", type=float, default=0.0, help="fracción de respuestas lentas")
+    parser.add_argument("--latencia-lenta-ms", type=float, default=1000)
+    parser.add_argument("--errores", type=float, default=0.0, help="fracción de respuestas 503")
+    args = parser.parse_args()
+
+    servidor = FakeSearchServer(args.host, args.puerto, args.latencia_ms, args.lentas,
+                                args.latencia_lenta_ms, args.errores)
+    print(f"🔎 Servidor de búsqueda simulado en {servidor.url} (Ctrl+C para salir)")
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.stop()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+🧪 Streaming del LLM con el pool 'llm' saturado
+
+Comprueba que PooledHuggingFacePipeline._astream falla enseguida con
+ExecutorSaturatedError (el 503 con Retry-After de la API) en lugar de quedarse
+esperando un token que nunca llega, y que cancelar el consumo detiene al hilo
+productor.
+
+Ejecutar: python test_streaming_pool_saturado.py  (o con pytest)
+"""
+
+import asyncio
+import threading
+import time
+
+import app.agent_service as agent_service
+from app.agent_service import PooledHuggingFacePipeline
+from app.executors import BoundedExecutor, ExecutorSaturatedError
+from langchain_core.outputs import GenerationChunk
+
+class FakeStreamingPipeline(PooledHuggingFacePipeline):
+    """Pipeline sin modelo: un token cada 10 ms mientras no se le pida parar"""
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        for i in range(500):
+            type(self).generated += 1
+            time.sleep(0.01)
+            yield GenerationChunk(text=f"t{i} ")
+
+FakeStreamingPipeline.generated = 0
+
+async def _collect(llm: PooledHuggingFacePipeline, timeout: float):
+    async def consume():
+        return [chunk async for chunk in llm._astream("hola")]
+    return await asyncio.wait_for(consume(), timeout)
+
+async def _saturated_pool():
+    pool = BoundedExecutor("llm", max_workers=1, max_queue=0)
+    busy = threading.Event()
+    blocker = asyncio.ensure_future(pool.run(busy.wait, 5))
+    await asyncio.sleep(0.05)
+
+    original = agent_service.get_executor
+    agent_service.get_executor = lambda name: pool
+    try:
+        llm = FakeStreamingPipeline.model_construct()
+        t0 = time.perf_counter()
+        try:
+            await _collect(llm, timeout=3)
+        except ExecutorSaturatedError:
+            elapsed = time.perf_counter() - t0
+        else:
+            raise AssertionError("se esperaba ExecutorSaturatedError")
+        assert elapsed < 1, f"el streaming tardó {elapsed:.2f}s en fallar"
+        print(f"✅ Pool saturado: ExecutorSaturatedError en {elapsed * 1000:.1f} ms")
+    finally:
+        agent_service.get_executor = original
+        busy.set()
+        await blocker
+        pool.shutdown()
+
+async def _cancelled_consumer():
+    pool = BoundedExecutor("llm", max_workers=1, max_queue=0)
+    original = agent_service.get_executor
+    agent_service.get_executor = lambda name: pool
+    try:
+        FakeStreamingPipeline.generated = 0
+        llm = FakeStreamingPipeline.model_construct()
+        try:
+            await _collect(llm, timeout=0.2)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.2)
+        generated = FakeStreamingPipeline.generated
+        await asyncio.sleep(0.2)
+        assert FakeStreamingPipeline.generated == generated, "el productor siguió generando"
+        assert pool.pending == 0, "el hilo productor sigue ocupando el pool"
+        print(f"✅ Consumidor cancelado: el productor paró tras {generated} tokens")
+    finally:
+        agent_service.get_executor = original
+        pool.shutdown()
+
+def test_astream_saturated_pool_fails_fast():
+    asyncio.run(_saturated_pool())
+
+def test_astream_cancel_stops_producer():
+    asyncio.run(_cancelled_consumer())
+
+if __name__ == "__main__":
+    test_astream_saturated_pool_fails_fast()
+    test_astream_cancel_stops_producer()
@@ -0,0 +1,29 @@
+"""
+🍴 Configuración de gunicorn para servir main.py con varios workers
+
+El modelo de traducción se carga una sola vez en el proceso maestro y los workers,
+creados con fork, comparten sus pesos copy-on-write en lugar de cargar una copia
+cada uno.
+
+Ejecutar: gunicorn -c gunicorn.conf.py main:app
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Importar la app en el maestro antes del fork (necesario para compartir el modelo)
+preload_app = True
+
+def on_starting(server):
+    """Se ejecuta en el maestro, con la app ya importada y antes de crear workers"""
+    import main
+    main.preload_shared_model()
+
+def post_fork(server, worker):
+    """Se ejecuta en cada worker recién creado"""
+    import main
+    main.configure_worker(workers)
@@ -1,13 +1,30 @@
 # 🚀 API de IA Optimizada - Carga bajo demanda
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 import uvicorn
+import asyncio
+import ctypes
+import functools
+import gc
+import json
 import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
 
 # Imports de LangChain y HuggingFace (solo cuando sea necesario)
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 
 # 📋 Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +34,74 @@ logger = logging.getLogger(__name__)
 translator_llm = None
 chains = {}
 
+# ⚙️ Configuración del micro-batching (variables de entorno)
+BATCH_MAX_SIZE = int(os.getenv("TRANSLATE_BATCH_MAX_SIZE", "16"))      # Máximo de textos por lote
+BATCH_MAX_WAIT_MS = float(os.getenv("TRANSLATE_BATCH_MAX_WAIT_MS", "5"))  # Ventana de espera para agrupar
+
+# ⚙️ Configuración del executor de inferencia
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))        # Hilos dedicados al modelo
+INFERENCE_QUEUE_MAX = int(os.getenv("INFERENCE_QUEUE_MAX", "64"))   # Peticiones en curso antes de rechazar
+
+# ⚙️ Configuración de carga del modelo
+TRANSLATOR_MODEL = "Helsinki-NLP/opus-mt-en-es"
+TRANSLATOR_BACKENDS = ("pytorch", "pytorch-int8", "onnx")
+TRANSLATOR_BACKEND = os.getenv("TRANSLATOR_BACKEND", "pytorch").lower()   # Backend de inferencia
+TRANSLATOR_ONNX_DIR = os.getenv("TRANSLATOR_ONNX_DIR", "")                # Dónde guardar/leer el export ONNX
+PRELOAD_TRANSLATOR = os.getenv("PRELOAD_TRANSLATOR", "false").lower() == "true"  # Cargar al arrancar
+TRANSLATOR_WARMUP = os.getenv("TRANSLATOR_WARMUP", "true").lower() == "true"     # Traducciones de calentamiento
+WARMUP_TEXTS = [
+    "Hello, how are you?",
+    "This is a short warmup sentence for the translation model.",
+]
+
+# ⚙️ Configuración de liberación de memoria
+IDLE_TIMEOUT_S = float(os.getenv("TRANSLATOR_IDLE_TIMEOUT_S", "0"))            # 0 = nunca descargar por inactividad
+MEMORY_WATERMARK_MB = float(os.getenv("TRANSLATOR_MEMORY_WATERMARK_MB", "0"))  # 0 = sin límite de RSS
+MEMORY_CHECK_S = float(os.getenv("TRANSLATOR_MEMORY_CHECK_S", "30"))           # Intervalo del monitor
+
+# 🎨 Estilos: instrucción fija de cada estilo. Ya no se envía al modelo con cada texto;
+# se traduce una sola vez al cargar y se antepone a la traducción como post-procesado
+STYLE_PREFIXES = {
+    "basico": "",
+    "formal": "Traduce el siguiente texto al español de manera como si fuera para niños de 5 años:",
+    "creativo": "Traduce el siguiente texto al español de manera para un animal:"
+}
+
+# 🩺 Estado de carga del modelo (expuesto en /health)
+model_state = {
+    "estado": "no_cargado",   # no_cargado | cargando | cargado | error
+    "backend": TRANSLATOR_BACKEND,
+    "compartido": False,      # Cargado en el proceso maestro antes del fork
+    "tiempo_carga_s": None,
+    "tiempo_warmup_s": None,
+    "error": None,
+    "ultimo_uso": None,       # Epoch de la última inferencia
+    "descargas": 0,
+    "ultima_descarga": None,  # Motivo de la última descarga: inactividad | memoria
+    "bytes_reclamados": 0
+}
+_load_lock = threading.Lock()
+_load_task: Optional[asyncio.Future] = None
+_warmup_pending = False
+
+# Instrucción ya traducida de cada estilo, por proceso (ver _translate_style_prefixes)
+_style_prefixes: Dict[str, str] = {}
+_prefix_lock = threading.Lock()
+
+# ⚙️ Configuración de la caché de traducciones
+CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "2048"))
+CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CACHE_TTL_S = float(os.getenv("TRANSLATION_CACHE_TTL_S", "0"))          # 0 = sin expiración
+CACHE_DISK_PATH = os.getenv("TRANSLATION_CACHE_DISK_PATH", "")          # Vacío = sin segundo nivel
+
+# ⚙️ Configuración de la traducción en streaming
+STREAM_MAX_CHARS = int(os.getenv("TRANSLATE_STREAM_MAX_CHARS", "20000"))        # Longitud máxima del documento
+STREAM_SEGMENT_MAX_CHARS = int(os.getenv("TRANSLATE_SEGMENT_MAX_CHARS", "400"))  # Longitud máxima por segmento
+STREAM_WINDOW = max(1, int(os.getenv("TRANSLATE_STREAM_WINDOW", str(BATCH_MAX_SIZE))))  # Segmentos en vuelo por stream (mínimo 1)
+
+# ⚙️ Configuración del endpoint de traducción por lotes
+BATCH_ENDPOINT_MAX_ITEMS = int(os.getenv("TRANSLATE_BATCH_MAX_ITEMS", "256"))  # Textos máximos por petición
+
 # 📊 Modelos Pydantic
 class TranslationRequest(BaseModel):
     texto: str = Field(..., min_length=1, max_length=500, description="Texto en inglés a traducir")
@@ -27,62 +112,783 @@ class TranslationResponse(BaseModel):
     texto_traducido: str
     estilo_usado: str
 
+class BatchTranslationRequest(BaseModel):
+    items: List[TranslationRequest] = Field(
+        ..., min_length=1, max_length=BATCH_ENDPOINT_MAX_ITEMS, description="Textos a traducir con su estilo"
+    )
+
+class BatchTranslationItem(BaseModel):
+    indice: int
+    resultado: Optional[TranslationResponse] = None
+    error: Optional[str] = None
+
+class BatchTranslationResponse(BaseModel):
+    resultados: List[BatchTranslationItem]
+    total: int
+    exitosos: int
+    fallidos: int
+
+class StreamTranslationRequest(BaseModel):
+    texto: str = Field(..., min_length=1, max_length=STREAM_MAX_CHARS, description="Documento en inglés a traducir")
+    estilo: Literal["basico", "formal", "creativo"] = Field(default="basico", description="Estilo de traducción")
+
+# 🏗️ Construcción del pipeline según el backend configurado
+def build_translation_pipeline(backend: str = TRANSLATOR_BACKEND, batch_size: int = BATCH_MAX_SIZE):
+    """
+    Crea el pipeline de traducción de transformers para el backend indicado:
+    - pytorch: float32 (comportamiento original)
+    - pytorch-int8: cuantización dinámica int8 de las capas Linear
+    - onnx: export a ONNX Runtime con optimum
+    Todos devuelven el mismo tipo de pipeline, así que `chains` no cambia.
+    
+    batch_size es el tamaño de lote del propio pipeline: sin él, transformers pasa
+    cada texto de una lista por el modelo por separado (lote de 1).
+    """
+    from transformers import pipeline
+    
+    if backend not in TRANSLATOR_BACKENDS:
+        raise ValueError(f"TRANSLATOR_BACKEND debe ser uno de: {', '.join(TRANSLATOR_BACKENDS)}")
+    
+    if backend == "pytorch":
+        return pipeline("translation", model=TRANSLATOR_MODEL, device="cpu", batch_size=batch_size)
+    
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(TRANSLATOR_MODEL)
+    
+    if backend == "pytorch-int8":
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+        
+        model = AutoModelForSeq2SeqLM.from_pretrained(TRANSLATOR_MODEL)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("translation", model=model, tokenizer=tokenizer, device="cpu", batch_size=batch_size)
+    
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("El backend 'onnx' requiere optimum: pip install optimum[onnxruntime]") from e
+    
+    # Reutilizar un export previo si existe; si no, exportar (y guardarlo si hay directorio)
+    if TRANSLATOR_ONNX_DIR and os.path.isdir(TRANSLATOR_ONNX_DIR):
+        model = ORTModelForSeq2SeqLM.from_pretrained(TRANSLATOR_ONNX_DIR)
+    else:
+        model = ORTModelForSeq2SeqLM.from_pretrained(TRANSLATOR_MODEL, export=True)
+        if TRANSLATOR_ONNX_DIR:
+            model.save_pretrained(TRANSLATOR_ONNX_DIR)
+    return pipeline("translation", model=model, tokenizer=tokenizer, batch_size=batch_size)
+
 # 🔧 Función para cargar traductor bajo demanda
-def load_translator():
-    """Carga el modelo de traducción solo cuando se necesita"""
+def load_translator(warmup: bool = TRANSLATOR_WARMUP, translate_prefixes: bool = True):
+    """
+    Carga el modelo de traducción solo cuando se necesita.
+    El lock garantiza una única carga aunque varios hilos la pidan a la vez.
+    Con translate_prefixes=False no se ejecuta ninguna inferencia durante la carga:
+    las instrucciones de estilo se traducen en el primer uso.
+    """
     global translator_llm, chains
     
     if translator_llm is not None:
         return  # Ya está cargado
     
+    with _load_lock:
+        if translator_llm is not None:
+            return  # Otro hilo terminó la carga mientras esperábamos
+        _load_translator_locked(warmup, translate_prefixes)
+
+def _load_translator_locked(warmup: bool, translate_prefixes: bool = True):
+    """Carga, calienta y publica el modelo (llamar con _load_lock adquirido)"""
+    global translator_llm, chains
+    
     try:
-        logger.info("🤖 Cargando modelo de traducción bajo demanda...")
+        logger.info(f"🤖 Cargando modelo de traducción bajo demanda (backend: {TRANSLATOR_BACKEND})...")
+        model_state.update(estado="cargando", error=None)
+        inicio = time.perf_counter()
         
         from langchain_huggingface import HuggingFacePipeline
-        from transformers import pipeline
         
-        translator_pipeline = pipeline(
-            "translation",
-            model="Helsinki-NLP/opus-mt-en-es",
-            device="cpu"
-        )
-        translator_llm = HuggingFacePipeline(pipeline=translator_pipeline)
+        # El pipeline agrupa con padding hasta BATCH_MAX_SIZE textos por pasada del modelo;
+        # HuggingFacePipeline solo trocea la lista de prompts con el mismo tamaño
+        translator_pipeline = build_translation_pipeline(TRANSLATOR_BACKEND, BATCH_MAX_SIZE)
+        llm = HuggingFacePipeline(pipeline=translator_pipeline, batch_size=BATCH_MAX_SIZE)
         
-        # Crear prompts
-        prompt_basico = PromptTemplate(
+        # Un único prompt: el modelo solo ve el texto del usuario, sea cual sea el estilo
+        prompt = PromptTemplate(
             input_variables=["texto"],
             template="{texto}"
         )
+        base_chain = prompt | llm | StrOutputParser()
         
-        prompt_formal = PromptTemplate(
-            input_variables=["texto"], 
-            template="Traduce el siguiente texto al español de manera como si fuera para niños de 5 años: {texto}"
-        )
-        
-        prompt_creativo = PromptTemplate(
-            input_variables=["texto"],
-            template="Traduce el siguiente texto al español de manera para un animal: {texto}"
-        )
+        # Traducir la instrucción de cada estilo una sola vez y reutilizarla
+        if translate_prefixes:
+            _translate_style_prefixes(base_chain)
         
         # Crear chains
-        output_parser = StrOutputParser()
-        chains = {
-            "basico": prompt_basico | translator_llm | output_parser,
-            "formal": prompt_formal | translator_llm | output_parser,
-            "creativo": prompt_creativo | translator_llm | output_parser
+        nuevas_chains = {
+            estilo: base_chain | RunnableLambda(functools.partial(_apply_style, base_chain, estilo))
+            for estilo in STYLE_PREFIXES
         }
+        model_state["tiempo_carga_s"] = round(time.perf_counter() - inicio, 3)
+        
+        # Calentar antes de publicar: el primer usuario real no paga la inicialización
+        if warmup:
+            _warmup_translator(nuevas_chains)
+        
+        chains = nuevas_chains
+        translator_llm = llm
+        model_state.update(estado="cargado", ultimo_uso=time.time())
         
-        logger.info("✅ Modelo de traducción cargado exitosamente")
+        logger.info(f"✅ Modelo de traducción cargado exitosamente en {model_state['tiempo_carga_s']}s")
         
     except Exception as e:
+        model_state.update(estado="error", error=str(e))
         logger.error(f"❌ Error cargando modelo de traducción: {str(e)}")
         raise
 
+def _translate_style_prefixes(base_chain):
+    """Traduce las instrucciones de estilo que falten en este proceso (una vez)"""
+    with _prefix_lock:
+        for estilo, instruccion in STYLE_PREFIXES.items():
+            if estilo not in _style_prefixes:
+                _style_prefixes[estilo] = base_chain.invoke({"texto": instruccion}) if instruccion else ""
+
+def _apply_style(base_chain, estilo: str, traduccion: str) -> str:
+    """Antepone la instrucción ya traducida del estilo"""
+    prefijo = _style_prefixes.get(estilo)
+    if prefijo is None:
+        # Modelo heredado del maestro sin prefijos: traducirlos ya dentro del worker
+        _translate_style_prefixes(base_chain)
+        prefijo = _style_prefixes[estilo]
+    return f"{prefijo} {traduccion}" if prefijo else traduccion
+
+def _warmup_translator(chains_a_calentar: Dict):
+    """Ejecuta unas traducciones de prueba por estilo (individual y en lote)"""
+    inicio = time.perf_counter()
+    for chain in chains_a_calentar.values():
+        chain.invoke({"texto": WARMUP_TEXTS[0]})
+        chain.batch([{"texto": texto} for texto in WARMUP_TEXTS])
+    model_state["tiempo_warmup_s"] = round(time.perf_counter() - inicio, 3)
+    logger.info(f"🔥 Warmup del traductor completado en {model_state['tiempo_warmup_s']}s")
+
+def _translate_batch(estilo: str, textos: List[str], return_exceptions: bool = False) -> List[Any]:
+    """
+    Traduce una lista de textos con el mismo estilo en una sola llamada al pipeline.
+    Con return_exceptions=True los fallos se devuelven en su posición en lugar de lanzarse.
+    """
+    model_state["ultimo_uso"] = time.time()
+    return chains[estilo].batch([{"texto": texto} for texto in textos], return_exceptions=return_exceptions)
+
+# 🍴 Modo multi-worker: modelo cargado una vez y compartido copy-on-write
+def preload_shared_model():
+    """
+    Carga el modelo en el proceso maestro de gunicorn antes de crear los workers.
+    Tras el fork, los workers comparten las páginas de memoria de los pesos mientras
+    nadie las escriba (y la inferencia solo las lee).
+    """
+    global _warmup_pending
+    
+    if TRANSLATOR_BACKEND == "onnx":
+        # Las sesiones de ONNX Runtime crean hilos propios y no sobreviven a un fork
+        logger.warning("⚠️ El backend 'onnx' no se comparte entre workers: cada worker cargará su copia")
+        return
+    
+    # Sin ninguna inferencia (ni warmup ni traducción de las instrucciones de estilo):
+    # ejecutarla antes del fork arranca los pools de hilos de torch/OpenMP, que no son
+    # seguros tras un fork. Cada worker calienta y traduce las instrucciones al arrancar.
+    load_translator(warmup=False, translate_prefixes=False)
+    model_state["compartido"] = True
+    _warmup_pending = TRANSLATOR_WARMUP
+    
+    # Sacar los objetos ya creados del recolector: si el GC los recorre en un worker,
+    # escribe en sus cabeceras y fuerza la copia de esas páginas
+    gc.collect()
+    gc.freeze()
+    logger.info("🍴 Modelo precargado en el proceso maestro para compartir entre workers")
+
+def configure_worker(num_workers: int):
+    """Ajustes por worker tras el fork: repartir los núcleos entre los workers"""
+    try:
+        import torch
+        hilos = max(1, (os.cpu_count() or 1) // max(1, num_workers))
+        torch.set_num_threads(hilos)
+        logger.info(f"🍴 Worker {os.getpid()}: torch con {hilos} hilos")
+    except ImportError:
+        pass
+
+def memory_usage() -> Dict[str, Optional[float]]:
+    """
+    Memoria del proceso en MB (Linux). PSS reparte las páginas compartidas entre los
+    procesos que las usan, así que es la cifra a sumar entre workers; RSS las cuenta enteras.
+    """
+    uso = {"rss_mb": None, "pss_mb": None, "compartida_mb": None}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            campos = {linea.split(":")[0]: int(linea.split()[1]) for linea in f if linea.endswith("kB\n")}
+        uso["rss_mb"] = round(campos.get("Rss", 0) / 1024, 1)
+        uso["pss_mb"] = round(campos.get("Pss", 0) / 1024, 1)
+        uso["compartida_mb"] = round((campos.get("Shared_Clean", 0) + campos.get("Shared_Dirty", 0)) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return uso
+
+# 🧹 Liberación de memoria: descarga por inactividad o por superar la marca de RSS
+def _release_memory() -> int:
+    """Recolecta y devuelve memoria al sistema; retorna los bytes de RSS liberados"""
+    antes = memory_usage()["rss_mb"] or 0
+    gc.collect()
+    try:
+        # glibc no devuelve al sistema los huecos liberados hasta que se le pide
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    despues = memory_usage()["rss_mb"] or 0
+    return max(0, int((antes - despues) * 1024 * 1024))
+
+async def unload_translator(motivo: str) -> bool:
+    """
+    Descarga el modelo si no hay traducciones en curso. La siguiente petición lo
+    vuelve a cargar por el mismo camino single-flight de aload_translator.
+    """
+    global translator_llm, chains
+    
+    if translator_llm is None or inference.pendientes > 0:
+        return False
+    
+    # Sin await entre la comprobación y el cambio: ninguna petición puede colarse
+    translator_llm = None
+    chains = {}
+    model_state.update(estado="no_cargado", ultima_descarga=motivo)
+    model_state["descargas"] += 1
+    
+    reclamados = await inference.run(_release_memory)
+    model_state["bytes_reclamados"] += reclamados
+    logger.info(f"🧹 Modelo descargado ({motivo}): {reclamados / 1024 / 1024:.1f} MB liberados")
+    return True
+
+async def _memory_monitor():
+    """Tarea de fondo que aplica la política de inactividad y de marca de memoria"""
+    while True:
+        await asyncio.sleep(MEMORY_CHECK_S)
+        try:
+            if model_state["compartido"]:
+                # Los pesos son páginas compartidas con el maestro: descargarlos no libera
+                # nada y recargarlos crearía una copia privada en este worker
+                continue
+            if translator_llm is None:
+                # Nada que descargar: si el RSS sigue alto es por otra cosa y vaciar la
+                # caché en cada vuelta solo tiraría traducciones útiles
+                continue
+            
+            rss = memory_usage()["rss_mb"]
+            if MEMORY_WATERMARK_MB and rss and rss > MEMORY_WATERMARK_MB:
+                logger.warning(f"⚠️ RSS {rss} MB por encima de la marca ({MEMORY_WATERMARK_MB} MB)")
+                translation_cache.clear()
+                await unload_translator("memoria")
+                continue
+            
+            ultimo_uso = model_state["ultimo_uso"]
+            if IDLE_TIMEOUT_S and ultimo_uso and time.time() - ultimo_uso > IDLE_TIMEOUT_S:
+                await unload_translator("inactividad")
+        except Exception as e:
+            logger.error(f"Error en el monitor de memoria: {str(e)}")
+
+# 🧵 Executor dedicado para inferencia con control de admisión
+class InferenceSaturatedError(Exception):
+    """La cola de inferencia está llena y no se admiten más peticiones"""
+
+class InferenceExecutor:
+    """
+    Pool de hilos acotado para todo el trabajo bloqueante del modelo (carga e inferencia),
+    para que el event loop siga atendiendo /health, /demo y el resto de endpoints
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS, max_pending: int = INFERENCE_QUEUE_MAX):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.pendientes = 0
+        self.rechazadas = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Creación perezosa: el pool solo existe si alguien llega a usar el modelo
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inferencia"
+            )
+        return self._executor
+
+    @contextmanager
+    def admit(self, peso: int = 1):
+        """
+        Reserva `peso` huecos (textos) o lanza InferenceSaturatedError si no caben.
+        Con la cola vacía se admite siempre, para que un lote grande no quede bloqueado.
+        """
+        if self.pendientes > 0 and self.pendientes + peso > self.max_pending:
+            self.rechazadas += 1
+            raise InferenceSaturatedError(
+                f"Cola de inferencia saturada ({self.pendientes}/{self.max_pending})"
+            )
+        self.pendientes += peso
+        try:
+            yield
+        finally:
+            self.pendientes -= peso
+
+    async def run(self, func: Callable, *args):
+        """Ejecuta una función bloqueante en el pool de inferencia"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args))
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "max_pendientes": self.max_pending,
+            "pendientes": self.pendientes,
+            "rechazadas": self.rechazadas
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+inference = InferenceExecutor()
+
+async def atranslate_batch(estilo: str, textos: List[str], return_exceptions: bool = False) -> List[Any]:
+    """Fachada async sobre `chains`: traduce un lote sin bloquear el event loop"""
+    return await inference.run(_translate_batch, estilo, textos, return_exceptions)
+
+async def aload_translator():
+    """
+    Carga single-flight: la primera petición lanza la carga en el pool de inferencia
+    y el resto espera esa misma tarea en lugar de cargar otra copia del modelo
+    """
+    global _load_task
+    
+    if translator_llm is not None:
+        return
+    
+    loop = asyncio.get_running_loop()
+    if _load_task is None or _load_task.done() or _load_task.get_loop() is not loop:
+        _load_task = asyncio.ensure_future(inference.run(load_translator))
+    
+    # shield: si una petición se cancela, la carga continúa para las demás
+    await asyncio.shield(_load_task)
+
+# 💾 Caché de traducciones (LRU + TTL en memoria, segundo nivel opcional en disco)
+CacheKey = Tuple[str, str]
+
+class CacheTier(ABC):
+    """Interfaz para un segundo nivel de caché persistente"""
+
+    @abstractmethod
+    def get(self, key: CacheKey, max_age: Optional[float]) -> Optional[str]:
+        """Traducción guardada con menos de max_age segundos (None = sin límite) o None"""
+
+    @abstractmethod
+    def set(self, key: CacheKey, value: str):
+        """Guardar una traducción"""
+
+    @abstractmethod
+    def clear(self):
+        """Vaciar el nivel"""
+
+class SQLiteCacheTier(CacheTier):
+    """Segundo nivel en un fichero SQLite local: sobrevive a reinicios del proceso"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexión perezosa por proceso: una conexión SQLite no debe cruzar un fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS traducciones ("
+                    "texto TEXT NOT NULL, estilo TEXT NOT NULL, traduccion TEXT NOT NULL, "
+                    "creado REAL NOT NULL, PRIMARY KEY (texto, estilo))"
+                )
+        return self._conn
+
+    def get(self, key: CacheKey, max_age: Optional[float]) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT traduccion, creado FROM traducciones WHERE texto = ? AND estilo = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        if max_age and time.time() - row[1] > max_age:
+            return None
+        return row[0]
+
+    def set(self, key: CacheKey, value: str):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO traducciones (texto, estilo, traduccion, creado) VALUES (?, ?, ?, ?)",
+                    (*key, value, time.time())
+                )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM traducciones")
+
+class TranslationCache:
+    """
+    Caché LRU acotada por número de entradas y por memoria, con TTL opcional.
+    La clave es (texto normalizado, estilo).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttl: float = CACHE_TTL_S,
+        segundo_nivel: Optional[CacheTier] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl if ttl > 0 else None
+        self.segundo_nivel = segundo_nivel
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.stats = {"hits": 0, "hits_disco": 0, "misses": 0, "evictions": 0, "expiradas": 0}
+
+    @staticmethod
+    def make_key(texto: str, estilo: str) -> CacheKey:
+        """Normaliza espacios para que variantes triviales compartan entrada"""
+        return " ".join(texto.split()), estilo
+
+    def get(self, texto: str, estilo: str) -> Optional[str]:
+        """Busca solo en memoria"""
+        key = self.make_key(texto, estilo)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, creado, _ = entry
+        if self.ttl and time.monotonic() - creado > self.ttl:
+            self._remove(key)
+            self.stats["expiradas"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, texto: str, estilo: str, value: str):
+        """Guarda solo en memoria, desalojando las entradas menos usadas si hace falta"""
+        key = self.make_key(texto, estilo)
+        size = sys.getsizeof(key[0]) + sys.getsizeof(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic(), size)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    async def aget(self, texto: str, estilo: str) -> Optional[str]:
+        """Busca en memoria y, si falla, en el segundo nivel (fuera del event loop)"""
+        value = self.get(texto, estilo)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        if self.segundo_nivel is not None:
+            key = self.make_key(texto, estilo)
+            value = await asyncio.to_thread(self.segundo_nivel.get, key, self.ttl)
+            if value is not None:
+                self.stats["hits_disco"] += 1
+                self.set(texto, estilo, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def aset(self, texto: str, estilo: str, value: str):
+        """Guarda en memoria y en el segundo nivel"""
+        self.set(texto, estilo, value)
+        if self.segundo_nivel is not None:
+            await asyncio.to_thread(self.segundo_nivel.set, self.make_key(texto, estilo), value)
+
+    def _remove(self, key: CacheKey):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entradas": len(self._entries),
+            "max_entradas": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+            "segundo_nivel": type(self.segundo_nivel).__name__ if self.segundo_nivel else None,
+            **self.stats
+        }
+
+translation_cache = TranslationCache(
+    segundo_nivel=SQLiteCacheTier(CACHE_DISK_PATH) if CACHE_DISK_PATH else None
+)
+
+# 📦 Micro-batching: agrupa peticiones concurrentes en un solo lote del modelo
+class _ColaEstilo:
+    """Peticiones pendientes de un mismo estilo (ligadas a un event loop)"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pendientes: List[tuple] = []
+        self.hay_peticiones = asyncio.Event()
+        self.lote_lleno = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+
+class TranslationBatcher:
+    """
+    Acumula las peticiones que llegan durante unos milisegundos (o hasta llenar el lote),
+    las traduce juntas con el pipeline y devuelve a cada llamador su resultado
+    """
+
+    def __init__(self, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._colas: Dict[str, _ColaEstilo] = {}
+        self.stats = {"lotes": 0, "peticiones": 0, "lote_maximo": 0}
+
+    async def translate(self, texto: str, estilo: str) -> str:
+        """Encola un texto y espera su traducción"""
+        loop = asyncio.get_running_loop()
+        cola = self._colas.get(estilo)
+        if cola is None or cola.loop is not loop:
+            cola = self._colas[estilo] = _ColaEstilo(loop)
+        if cola.worker is None or cola.worker.done():
+            cola.worker = asyncio.create_task(self._worker(estilo, cola))
+
+        future = loop.create_future()
+        cola.pendientes.append((texto, future))
+        cola.hay_peticiones.set()
+        if len(cola.pendientes) >= self.max_batch_size:
+            cola.lote_lleno.set()
+
+        return await future
+
+    async def _worker(self, estilo: str, cola: _ColaEstilo):
+        """Forma lotes de un estilo y los ejecuta de uno en uno"""
+        while True:
+            await cola.hay_peticiones.wait()
+
+            # Ventana de espera: seguir acumulando salvo que el lote ya esté lleno
+            if len(cola.pendientes) < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(cola.lote_lleno.wait(), timeout=self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            lote = cola.pendientes[:self.max_batch_size]
+            del cola.pendientes[:self.max_batch_size]
+            if not cola.pendientes:
+                cola.hay_peticiones.clear()
+            if len(cola.pendientes) < self.max_batch_size:
+                cola.lote_lleno.clear()
+
+            # Descartar llamadores que ya se fueron (petición cancelada)
+            lote = [(texto, future) for texto, future in lote if not future.done()]
+            if lote:
+                await self._run_batch(estilo, lote)
+
+    async def _run_batch(self, estilo: str, lote: List[tuple]):
+        """Ejecuta un lote fuera del event loop y reparte los resultados"""
+        textos = [texto for texto, _ in lote]
+        self.stats["lotes"] += 1
+        self.stats["peticiones"] += len(lote)
+        self.stats["lote_maximo"] = max(self.stats["lote_maximo"], len(lote))
+
+        try:
+            traducciones = await atranslate_batch(estilo, textos)
+        except Exception as e:
+            for _, future in lote:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), traduccion in zip(lote, traducciones):
+            if not future.done():
+                future.set_result(traduccion)
+
+batcher = TranslationBatcher()
+
+async def translate_one(texto: str, estilo: str) -> str:
+    """
+    Traduce un texto pasando por la caché; solo en caso de fallo se admite la
+    petición, se carga el modelo (si hace falta) y se encola en el batcher
+    """
+    traduccion = await translation_cache.aget(texto, estilo)
+    if traduccion is not None:
+        return traduccion
+    
+    with inference.admit():
+        if translator_llm is None:
+            logger.info("⏳ Primera petición - cargando modelo...")
+            await aload_translator()
+        
+        if estilo not in chains:
+            raise HTTPException(status_code=400, detail=f"Estilo '{estilo}' no válido")
+        
+        # Ejecutar traducción (agrupada con otras peticiones concurrentes)
+        traduccion = await batcher.translate(texto, estilo)
+    
+    await translation_cache.aset(texto, estilo, traduccion)
+    return traduccion
+
+async def translate_many(items: List[TranslationRequest]) -> List[BatchTranslationItem]:
+    """
+    Traduce una lista de peticiones: resuelve primero la caché y agrupa el resto por
+    estilo, ejecutando cada grupo como una única llamada por lotes al pipeline, que
+    lo pasa por el modelo en lotes con padding de hasta BATCH_MAX_SIZE textos
+    """
+    resultados: List[Optional[BatchTranslationItem]] = [None] * len(items)
+    
+    # Textos pendientes por estilo (deduplicados por clave de caché) -> índices que los esperan
+    grupos: Dict[str, Dict[CacheKey, List[int]]] = {}
+    for indice, item in enumerate(items):
+        traduccion = await translation_cache.aget(item.texto, item.estilo)
+        if traduccion is not None:
+            resultados[indice] = _batch_item(indice, item, traduccion)
+        else:
+            key = translation_cache.make_key(item.texto, item.estilo)
+            grupos.setdefault(item.estilo, {}).setdefault(key, []).append(indice)
+    
+    pendientes = sum(len(textos) for textos in grupos.values())
+    if pendientes:
+        with inference.admit(pendientes):
+            if translator_llm is None:
+                await aload_translator()
+            
+            estilos = list(grupos)
+            salidas = await asyncio.gather(*(
+                atranslate_batch(estilo, [texto for texto, _ in grupos[estilo]], True)
+                for estilo in estilos
+            ))
+        
+        for estilo, traducciones in zip(estilos, salidas):
+            for (key, indices), traduccion in zip(grupos[estilo].items(), traducciones):
+                if not isinstance(traduccion, Exception):
+                    await translation_cache.aset(key[0], estilo, traduccion)
+                for indice in indices:
+                    resultados[indice] = _batch_item(indice, items[indice], traduccion)
+    
+    return resultados
+
+def _batch_item(indice: int, item: TranslationRequest, traduccion: Any) -> BatchTranslationItem:
+    """Construye el resultado de un elemento del lote (éxito o error)"""
+    if isinstance(traduccion, Exception):
+        return BatchTranslationItem(indice=indice, error=f"Error en traducción: {str(traduccion)}")
+    
+    return BatchTranslationItem(
+        indice=indice,
+        resultado=TranslationResponse(
+            texto_original=item.texto,
+            texto_traducido=traduccion,
+            estilo_usado=item.estilo
+        )
+    )
+
+# ✂️ Segmentación y streaming de documentos largos
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+def split_sentences(texto: str, max_chars: int = STREAM_SEGMENT_MAX_CHARS) -> List[str]:
+    """Divide un texto en frases; las frases demasiado largas se cortan por espacios"""
+    segmentos = []
+    for frase in _SENTENCE_BOUNDARY.split(texto):
+        frase = frase.strip()
+        while len(frase) > max_chars:
+            corte = frase.rfind(" ", 0, max_chars)
+            if corte <= 0:
+                corte = max_chars
+            segmentos.append(frase[:corte].strip())
+            frase = frase[corte:].strip()
+        if frase:
+            segmentos.append(frase)
+    return segmentos
+
+def _sse(evento: str, datos: Dict[str, Any]) -> str:
+    """Formatea un evento server-sent events"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+async def stream_translation(segmentos: List[str], estilo: str):
+    """
+    Traduce los segmentos con una ventana deslizante de STREAM_WINDOW peticiones en
+    vuelo (que el batcher agrupa en lotes) y emite cada uno en orden en cuanto está listo
+    """
+    pendientes = deque()
+    siguiente = 0
+    
+    try:
+        yield _sse("inicio", {"segmentos": len(segmentos), "estilo_usado": estilo})
+        
+        for indice, segmento in enumerate(segmentos):
+            while siguiente < len(segmentos) and len(pendientes) < STREAM_WINDOW:
+                pendientes.append(asyncio.ensure_future(translate_one(segmentos[siguiente], estilo)))
+                siguiente += 1
+            
+            traduccion = await pendientes.popleft()
+            yield _sse("segmento", {"indice": indice, "texto_original": segmento, "texto_traducido": traduccion})
+        
+        yield _sse("fin", {"segmentos": len(segmentos), "estilo_usado": estilo})
+        
+    except Exception as e:
+        logger.error(f"Error en traducción en streaming: {str(e)}")
+        yield _sse("error", {"detalle": str(e)})
+    
+    finally:
+        # Cliente desconectado o error: no seguir traduciendo lo que nadie leerá
+        for tarea in pendientes:
+            tarea.cancel()
+
+# ♻️ Ciclo de vida de la aplicación
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _warmup_pending
+    
+    # Modelo heredado del proceso maestro: calentarlo ya dentro del worker
+    if _warmup_pending and translator_llm is not None:
+        _warmup_pending = False
+        await inference.run(_warmup_translator, chains)
+    
+    # Precarga opcional: el servidor acepta tráfico con el modelo ya cargado y caliente
+    if PRELOAD_TRANSLATOR:
+        logger.info("⏳ PRELOAD_TRANSLATOR activo - cargando modelo al arrancar...")
+        await aload_translator()
+    
+    monitor = asyncio.create_task(_memory_monitor()) if IDLE_TIMEOUT_S or MEMORY_WATERMARK_MB else None
+    
+    yield
+    
+    if monitor is not None:
+        monitor.cancel()
+    # Liberar los hilos de inferencia al apagar
+    inference.shutdown()
+
 # 🚀 Crear la aplicación FastAPI
 app = FastAPI(
     title="🤖 API de IA Optimizada",
     description="API con carga bajo demanda para traducción inglés-español",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 🏠 Endpoint raíz
@@ -93,6 +899,8 @@ async def root():
         "status": "ready",
         "endpoints": {
             "traduccion": "/translate",
+            "traduccion_lotes": "/translate/batch",
+            "traduccion_streaming": "/translate/stream",
             "salud": "/health",
             "documentacion": "/docs"
         }
@@ -104,7 +912,16 @@ async def health_check():
     return {
         "status": "healthy",
         "traductor_cargado": translator_llm is not None,
-        "memoria_usage": "optimizado - carga bajo demanda"
+        "modelo": model_state,
+        "batching": {
+            "max_batch_size": batcher.max_batch_size,
+            "max_wait_ms": batcher.max_wait * 1000,
+            **batcher.stats
+        },
+        "inferencia": inference.get_stats(),
+        "cache": translation_cache.get_stats(),
+        "memoria_usage": "optimizado - carga bajo demanda",
+        "memoria_proceso": {"pid": os.getpid(), **memory_usage()}
     }
 
 # 🔤 Endpoint de traducción (con carga bajo demanda)
@@ -112,19 +929,10 @@ async def health_check():
 async def translate_text(request: TranslationRequest):
     """
     Traduce texto de inglés a español con diferentes estilos
-    El modelo se carga automáticamente en la primera petición
+    El modelo se carga automáticamente en la primera petición que no esté en caché
     """
     try:
-        # Cargar modelo solo si es necesario
-        if translator_llm is None:
-            logger.info("⏳ Primera petición - cargando modelo...")
-            load_translator()
-        
-        if request.estilo not in chains:
-            raise HTTPException(status_code=400, detail=f"Estilo '{request.estilo}' no válido")
-        
-        # Ejecutar traducción
-        traduccion = chains[request.estilo].invoke({"texto": request.texto})
+        traduccion = await translate_one(request.texto, request.estilo)
         
         return TranslationResponse(
             texto_original=request.texto,
@@ -132,10 +940,57 @@ async def translate_text(request: TranslationRequest):
             estilo_usado=request.estilo
         )
         
+    except HTTPException:
+        raise
+    except InferenceSaturatedError as e:
+        logger.warning(f"⚠️ Petición rechazada: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error en traducción: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error en traducción: {str(e)}")
 
+# 📚 Endpoint de traducción por lotes
+@app.post("/translate/batch", response_model=BatchTranslationResponse)
+async def translate_batch(request: BatchTranslationRequest):
+    """
+    Traduce muchos textos en una sola petición. Los resultados y errores
+    se devuelven por elemento, en el mismo orden de entrada
+    """
+    try:
+        resultados = await translate_many(request.items)
+        fallidos = sum(1 for resultado in resultados if resultado.error)
+        
+        return BatchTranslationResponse(
+            resultados=resultados,
+            total=len(resultados),
+            exitosos=len(resultados) - fallidos,
+            fallidos=fallidos
+        )
+        
+    except InferenceSaturatedError as e:
+        logger.warning(f"⚠️ Lote rechazado: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error en traducción por lotes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error en traducción por lotes: {str(e)}")
+
+# 📡 Endpoint de traducción en streaming (documentos largos)
+@app.post("/translate/stream")
+async def translate_stream(request: StreamTranslationRequest):
+    """
+    Divide el documento en frases y emite cada traducción como evento SSE
+    en cuanto está lista, sin esperar al documento completo
+    """
+    segmentos = split_sentences(request.texto)
+    if not segmentos:
+        raise HTTPException(status_code=400, detail="El texto no contiene frases para traducir")
+    
+    return StreamingResponse(
+        stream_translation(segmentos, request.estilo),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # 🧪 Endpoint de demo rápido (sin IA)
 @app.get("/demo")
 async def demo():